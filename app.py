@@ -1,9 +1,12 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import math
+import time
 from datetime import datetime
-from database import get_session, inicializar_datos, OrdenTrabajo, AvisoAveria, Equipo
-from sqlalchemy import func
+from database import inicializar_datos
+from incremental import datos_dashboard
+from plantas import consultar_plantas, sumar, concatenar, plantas_de, selector_planta
 
 # Configuración de la página
 st.set_page_config(
@@ -31,30 +34,29 @@ st.markdown("""
 # Título principal
 st.markdown('<h1 class="main-header">🔧 Sistema de Gestión de Mantenimiento</h1>', unsafe_allow_html=True)
 
-# Obtener datos
-session = get_session()
+# Selección de planta
+planta = selector_planta(incluir_todas=True)
+
+# Obtener datos (en paralelo si hay varias plantas). La caché incremental solo
+# vuelve a leer filas nuevas o modificadas desde la última marca de agua.
+resultados = consultar_plantas(datos_dashboard, plantas_de(planta))
+metricas = sumar({p: r['metricas'] for p, r in resultados.items()})
 
 # Métricas principales
 st.subheader("📊 Métricas Principales")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    total_ordenes = session.query(OrdenTrabajo).count()
-    st.metric("Total Órdenes", total_ordenes)
+    st.metric("Total Órdenes", metricas['total_ordenes'])
 
 with col2:
-    ordenes_pendientes = session.query(OrdenTrabajo).filter_by(estado='Pendiente').count()
-    st.metric("Órdenes Pendientes", ordenes_pendientes)
+    st.metric("Órdenes Pendientes", metricas['ordenes_pendientes'])
 
 with col3:
-    ordenes_progreso = session.query(OrdenTrabajo).filter_by(estado='En Progreso').count()
-    st.metric("En Progreso", ordenes_progreso)
+    st.metric("En Progreso", metricas['ordenes_progreso'])
 
 with col4:
-    avisos_activos = session.query(AvisoAveria).filter(AvisoAveria.estado.in_(['Reportado', 'En Análisis'])).count()
-    st.metric("Avisos Activos", avisos_activos)
-
-session.close()
+    st.metric("Avisos Activos", metricas['avisos_activos'])
 
 # Gráficos y tablas
 st.markdown("---")
@@ -62,15 +64,10 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("📈 Órdenes por Estado")
-    session = get_session()
-    estado_data = session.query(
-        OrdenTrabajo.estado, 
-        func.count(OrdenTrabajo.id).label('cantidad')
-    ).group_by(OrdenTrabajo.estado).all()
-    session.close()
+    estado_data = sumar({p: r['por_estado'] for p, r in resultados.items()})
     
     if estado_data:
-        df_estado = pd.DataFrame(estado_data, columns=['Estado', 'Cantidad'])
+        df_estado = pd.DataFrame(list(estado_data.items()), columns=['Estado', 'Cantidad'])
         fig = px.pie(df_estado, values='Cantidad', names='Estado', 
                      color_discrete_sequence=px.colors.qualitative.Set3)
         fig.update_traces(textposition='inside', textinfo='percent+label')
@@ -80,15 +77,10 @@ with col1:
 
 with col2:
     st.subheader("📊 Órdenes por Prioridad")
-    session = get_session()
-    prioridad_data = session.query(
-        OrdenTrabajo.prioridad, 
-        func.count(OrdenTrabajo.id).label('cantidad')
-    ).group_by(OrdenTrabajo.prioridad).all()
-    session.close()
+    prioridad_data = sumar({p: r['por_prioridad'] for p, r in resultados.items()})
     
     if prioridad_data:
-        df_prioridad = pd.DataFrame(prioridad_data, columns=['Prioridad', 'Cantidad'])
+        df_prioridad = pd.DataFrame(list(prioridad_data.items()), columns=['Prioridad', 'Cantidad'])
         fig = px.bar(df_prioridad, x='Prioridad', y='Cantidad',
                      color='Prioridad', 
                      color_discrete_map={
@@ -105,24 +97,14 @@ with col2:
 # Órdenes recientes
 st.markdown("---")
 st.subheader("🔄 Órdenes de Trabajo Recientes")
-session = get_session()
-ordenes_recientes = session.query(OrdenTrabajo).order_by(OrdenTrabajo.fecha_creacion.desc()).limit(10).all()
-session.close()
-
-if ordenes_recientes:
-    datos_ordenes = []
-    for orden in ordenes_recientes:
-        datos_ordenes.append({
-            'Código': orden.codigo,
-            'Descripción': orden.descripcion,
-            'Equipo': orden.equipo.nombre if orden.equipo else 'N/A',
-            'Prioridad': orden.prioridad,
-            'Estado': orden.estado,
-            'Técnico': orden.tecnico_asignado or 'No asignado',
-            'Fecha Creación': orden.fecha_creacion.strftime('%d/%m/%Y %H:%M')
-        })
-    
+datos_ordenes = concatenar(
+    {p: r['recientes'] for p, r in resultados.items()},
+    orden=lambda o: o['Fecha Creación'], limite=10
+)
+
+if datos_ordenes:
     df_ordenes = pd.DataFrame(datos_ordenes)
+    df_ordenes['Fecha Creación'] = df_ordenes['Fecha Creación'].dt.strftime('%d/%m/%Y %H:%M')
     st.dataframe(df_ordenes, use_container_width=True, hide_index=True)
 else:
     st.info("No hay órdenes de trabajo recientes")
@@ -130,27 +112,28 @@ else:
 # Avisos críticos
 st.markdown("---")
 st.subheader("🚨 Avisos de Averías Críticos")
-session = get_session()
-avisos_criticos = session.query(AvisoAveria).filter(
-    AvisoAveria.prioridad.in_(['Alta', 'Crítica'])
-).order_by(AvisoAveria.fecha_reporte.desc()).limit(5).all()
-session.close()
+avisos_criticos = concatenar(
+    {p: r['criticos'] for p, r in resultados.items()},
+    orden=lambda a: a['fecha_reporte'], limite=5
+)
 
 if avisos_criticos:
     for aviso in avisos_criticos:
-        with st.expander(f"⚠️ {aviso.codigo} - {aviso.descripcion[:50]}...", expanded=False):
+        with st.expander(f"⚠️ {aviso['codigo']} - {aviso['descripcion'][:50]}...", expanded=False):
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.write(f"**Equipo:** {aviso.equipo.nombre if aviso.equipo else 'N/A'}")
-                st.write(f"**Reportado por:** {aviso.reportado_por}")
+                st.write(f"**Equipo:** {aviso['equipo']}")
+                st.write(f"**Reportado por:** {aviso['reportado_por']}")
             with col2:
-                st.write(f"**Prioridad:** {aviso.prioridad}")
-                st.write(f"**Estado:** {aviso.estado}")
+                st.write(f"**Prioridad:** {aviso['prioridad']}")
+                st.write(f"**Estado:** {aviso['estado']}")
             with col3:
-                st.write(f"**Fecha:** {aviso.fecha_reporte.strftime('%d/%m/%Y %H:%M')}")
+                st.write(f"**Fecha:** {aviso['fecha_reporte'].strftime('%d/%m/%Y %H:%M')}")
+                if 'Planta' in aviso:
+                    st.write(f"**Planta:** {aviso['Planta']}")
             
-            if aviso.observaciones:
-                st.info(f"**Observaciones:** {aviso.observaciones}")
+            if aviso['observaciones']:
+                st.info(f"**Observaciones:** {aviso['observaciones']}")
 else:
     st.info("No hay avisos críticos")
 
@@ -165,15 +148,17 @@ if st.sidebar.button("⚠️ Nuevo Aviso de Avería", use_container_width=True):
 if st.sidebar.button("🔄 Actualizar Datos", use_container_width=True):
     st.rerun()
 
+auto_actualizar = st.sidebar.checkbox("⏱️ Auto-actualizar", key="auto_actualizar")
+if auto_actualizar:
+    intervalo = st.sidebar.slider("Intervalo (segundos)", 2, 60, 10, key="intervalo_actualizacion")
+    cuenta_atras = st.sidebar.empty()
+
 # Información del sistema en sidebar
 st.sidebar.markdown("---")
 st.sidebar.subheader("ℹ️ Información del Sistema")
 st.sidebar.write(f"**Última actualización:** {datetime.now().strftime('%d/%m/%Y %H:%M')}")
 
-session = get_session()
-total_equipos = session.query(Equipo).count()
-session.close()
-st.sidebar.write(f"**Total equipos:** {total_equipos}")
+st.sidebar.write(f"**Total equipos:** {metricas['total_equipos']}")
 
 st.sidebar.markdown("---")
 st.sidebar.info("""
@@ -181,4 +166,17 @@ st.sidebar.info("""
                 
 Desarrollado con Streamlit
 🔧 Versión 1.0
-""")
\ No newline at end of file
+""")
+
+# Auto-actualización: sin cambios en la base cada ciclo cuesta solo las marcas de agua.
+# La espera va en tramos de medio segundo y cada tramo redibuja la cuenta
+# atrás; al enviar un elemento Streamlit atiende los reruns pendientes, así
+# que un clic o un cambio de página interrumpe la espera en menos de 0,5 s.
+if auto_actualizar:
+    fin = time.monotonic() + intervalo
+    restante = intervalo
+    while restante > 0:
+        cuenta_atras.caption(f"Próxima actualización en {math.ceil(restante)} s")
+        time.sleep(min(0.5, restante))
+        restante = fin - time.monotonic()
+    st.rerun()
@@ -0,0 +1,183 @@
+"""Archivado de órdenes y avisos cerrados.
+
+Las órdenes Completadas/Canceladas y los avisos Resueltos con más de
+``dias`` de antigüedad se mueven por lotes de la base caliente
+(mantenimiento.db) a la base de archivo (mantenimiento_archivo.db).
+
+Cada planta tiene su propia base de archivo.
+
+Uso: python archivo.py --dias 365 --lote 500 [--planta NOMBRE]
+"""
+import argparse
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, or_
+from sqlalchemy.orm import joinedload
+from database import (
+    get_session, get_session_archivo, Equipo, OrdenTrabajo, AvisoAveria,
+    OrdenTrabajoArchivo, AvisoAveriaArchivo, PLANTAS
+)
+
+ESTADOS_ORDEN_CERRADA = ['Completada', 'Cancelada']
+ESTADOS_AVISO_CERRADO = ['Resuelto']
+
+DIAS_ARCHIVADO = 365
+TAMANO_LOTE = 500
+
+def _copiar(fila, modelo_archivo, fecha_referencia):
+    columnas = modelo_archivo.__table__.columns.keys()
+    valores = {c.name: getattr(fila, c.name) for c in fila.__table__.columns if c.name in columnas}
+    return modelo_archivo(fecha_referencia=fecha_referencia, **valores)
+
+def _archivar_lotes(planta, modelo, modelo_archivo, fecha_ref, filtro, limite, lote):
+    """Mover por lotes las filas de ``modelo`` que cumplan ``filtro``"""
+    total = 0
+    while True:
+        session = get_session(planta)
+        session_archivo = get_session_archivo(planta)
+        try:
+            # Nunca se archiva la fila de mayor id: SQLite reutiliza el id
+            # máximo tras borrarlo y los códigos OT-/AV- se derivan de él.
+            max_id = session.query(func.max(modelo.id)).scalar()
+            filas = session.query(modelo, fecha_ref).filter(
+                filtro, fecha_ref < limite, modelo.id != max_id
+            ).order_by(modelo.id).limit(lote).all()
+
+            if not filas:
+                return total
+
+            # merge hace el proceso idempotente si se interrumpe entre commits
+            for fila, referencia in filas:
+                session_archivo.merge(_copiar(fila, modelo_archivo, referencia))
+            session_archivo.commit()
+
+            ids = [fila.id for fila, _ in filas]
+            session.query(modelo).filter(modelo.id.in_(ids)).delete(synchronize_session=False)
+            session.commit()
+            total += len(filas)
+        except Exception:
+            session_archivo.rollback()
+            session.rollback()
+            raise
+        finally:
+            session_archivo.close()
+            session.close()
+
+def archivar_cerrados(dias=DIAS_ARCHIVADO, lote=TAMANO_LOTE, planta=None):
+    """Archivar órdenes y avisos cerrados con más de ``dias`` de antigüedad"""
+    limite = datetime.now() - timedelta(days=dias)
+
+    ordenes = _archivar_lotes(
+        planta, OrdenTrabajo, OrdenTrabajoArchivo,
+        func.coalesce(OrdenTrabajo.fecha_fin_real, OrdenTrabajo.fecha_creacion),
+        OrdenTrabajo.estado.in_(ESTADOS_ORDEN_CERRADA),
+        limite, lote
+    )
+
+    # Los avisos que aún tienen órdenes en la base caliente se conservan
+    # para no romper la relación OrdenTrabajo.aviso
+    con_ordenes = select(OrdenTrabajo.aviso_id).where(OrdenTrabajo.aviso_id.isnot(None))
+    avisos = _archivar_lotes(
+        planta, AvisoAveria, AvisoAveriaArchivo,
+        func.coalesce(AvisoAveria.fecha_cierre, AvisoAveria.fecha_reporte),
+        AvisoAveria.estado.in_(ESTADOS_AVISO_CERRADO) & ~AvisoAveria.id.in_(con_ordenes),
+        limite, lote
+    )
+
+    return {'ordenes': ordenes, 'avisos': avisos}
+
+def limite_archivo(modelo_archivo=OrdenTrabajoArchivo, planta=None):
+    """Fecha de cierre más reciente archivada (None si el archivo está vacío)"""
+    session_archivo = get_session_archivo(planta)
+    try:
+        return session_archivo.query(func.max(modelo_archivo.fecha_referencia)).scalar()
+    finally:
+        session_archivo.close()
+
+def requiere_archivo(desde, modelo_archivo=OrdenTrabajoArchivo, planta=None):
+    """Indica si un rango que empieza en ``desde`` puede incluir filas archivadas"""
+    limite = limite_archivo(modelo_archivo, planta)
+    if limite is None:
+        return False
+    return desde is None or desde <= limite
+
+def conteo_archivo(columna, planta=None):
+    """Órdenes archivadas de ``planta`` agrupadas por ``columna`` ({valor: cantidad})"""
+    session_archivo = get_session_archivo(planta)
+    try:
+        campo = getattr(OrdenTrabajoArchivo, columna)
+        return dict(session_archivo.query(campo, func.count(OrdenTrabajoArchivo.id)).group_by(campo).all())
+    finally:
+        session_archivo.close()
+
+def _asignar_equipos(session, filas):
+    """Resolver ``equipo`` en filas archivadas, que no tienen relación ORM"""
+    ids = {f.equipo_id for f in filas if f.equipo_id}
+    equipos = {}
+    if ids:
+        equipos = {eq.id: eq for eq in session.query(Equipo).filter(Equipo.id.in_(ids)).all()}
+    for fila in filas:
+        fila.equipo = equipos.get(fila.equipo_id)
+    return filas
+
+def _sin_duplicados(ordenes, archivadas):
+    """Descartar filas archivadas que siguen en la base caliente.
+
+    Si el archivado se interrumpe entre el commit del archivo y el borrado
+    de la base caliente, la fila queda en ambas hasta la siguiente pasada.
+    """
+    ids = {o.id for o in ordenes}
+    return [o for o in archivadas if o.id not in ids]
+
+def ordenes_completadas(session, desde=None, planta=None):
+    """Órdenes completadas desde ``desde``, incluyendo el archivo si hace falta"""
+    query = session.query(OrdenTrabajo).options(joinedload(OrdenTrabajo.equipo)).filter_by(estado="Completada")
+    if desde:
+        # Las completadas sin fecha de fin no se pueden acotar: se muestran siempre
+        query = query.filter(or_(OrdenTrabajo.fecha_fin_real >= desde, OrdenTrabajo.fecha_fin_real.is_(None)))
+    ordenes = query.all()
+
+    if requiere_archivo(desde, planta=planta):
+        session_archivo = get_session_archivo(planta)
+        try:
+            query = session_archivo.query(OrdenTrabajoArchivo).filter_by(estado="Completada")
+            if desde:
+                query = query.filter(OrdenTrabajoArchivo.fecha_referencia >= desde)
+            ordenes += _asignar_equipos(session, _sin_duplicados(ordenes, query.all()))
+        finally:
+            session_archivo.close()
+
+    return sorted(ordenes, key=lambda o: o.fecha_fin_real or datetime.min, reverse=True)
+
+def historial_equipo(session, equipo_id, desde=None, planta=None):
+    """Órdenes de un equipo creadas desde ``desde``, incluyendo el archivo si hace falta"""
+    query = session.query(OrdenTrabajo).filter_by(equipo_id=equipo_id)
+    if desde:
+        query = query.filter(OrdenTrabajo.fecha_creacion >= desde)
+    ordenes = query.all()
+
+    # fecha_creacion <= fecha_referencia, así que el límite del archivo también acota este rango
+    if requiere_archivo(desde, planta=planta):
+        session_archivo = get_session_archivo(planta)
+        try:
+            query = session_archivo.query(OrdenTrabajoArchivo).filter_by(equipo_id=equipo_id)
+            if desde:
+                query = query.filter(OrdenTrabajoArchivo.fecha_creacion >= desde)
+            ordenes += _asignar_equipos(session, _sin_duplicados(ordenes, query.all()))
+        finally:
+            session_archivo.close()
+
+    return sorted(ordenes, key=lambda o: o.fecha_creacion or datetime.min, reverse=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archivar órdenes y avisos cerrados")
+    parser.add_argument("--dias", type=int, default=DIAS_ARCHIVADO,
+                        help="Antigüedad mínima en días desde el cierre")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE,
+                        help="Filas movidas por transacción")
+    parser.add_argument("--planta", choices=list(PLANTAS),
+                        help="Planta a archivar (todas por defecto)")
+    args = parser.parse_args()
+
+    for planta in [args.planta] if args.planta else PLANTAS:
+        resultado = archivar_cerrados(dias=args.dias, lote=args.lote, planta=planta)
+        print(f"{planta}: archivadas {resultado['ordenes']} órdenes y {resultado['avisos']} avisos")
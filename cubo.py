@@ -0,0 +1,148 @@
+"""Cubo de costos y horas de las órdenes completadas.
+
+Dimensiones: tipo × prioridad × técnico × equipo × ubicación × mes.
+Medidas: número de órdenes, horas y costos estimados y reales.
+
+Los cuboides (agregados por un subconjunto de dimensiones) se calculan
+con groupby de pandas y se guardan en una caché LRU por planta,
+dimensiones y versión de los datos. Un cuboide más grueso se obtiene
+agregando el cuboide en caché más pequeño que lo contenga, sin volver a
+leer los hechos. SQLite no tiene GROUPING SETS, así que todo el cálculo
+es en pandas.
+"""
+import threading
+from collections import OrderedDict
+import pandas as pd
+from sqlalchemy import func
+from database import get_session, get_session_archivo, OrdenTrabajo, OrdenTrabajoArchivo, PLANTA_PRINCIPAL
+from indice_equipos import obtener_indice, version_equipos
+
+DIMENSIONES = {
+    'tipo': 'Tipo',
+    'prioridad': 'Prioridad',
+    'tecnico': 'Técnico',
+    'equipo': 'Equipo',
+    'ubicacion': 'Ubicación',
+    'mes': 'Mes'
+}
+MEDIDAS = ['ordenes', 'horas_estimadas', 'horas_reales', 'costo_estimado', 'costo_real']
+
+TAMANO_CACHE = 64
+
+_COLUMNAS = ['tipo', 'prioridad', 'tecnico_asignado', 'equipo_id', 'fecha_creacion',
+             'fecha_fin_real', 'horas_estimadas', 'horas_reales', 'costo_estimado', 'costo_real']
+
+_cache = OrderedDict()
+_hechos = {}
+_lock = threading.Lock()
+
+def _version(session, session_archivo):
+    """Versión de los datos: cambia con cualquier alta, edición o archivado"""
+    return (
+        tuple(session.query(
+            func.count(OrdenTrabajo.id), func.max(OrdenTrabajo.id), func.max(OrdenTrabajo.updated_at)
+        ).one()),
+        tuple(session_archivo.query(
+            func.count(OrdenTrabajoArchivo.id), func.max(OrdenTrabajoArchivo.id)
+        ).one()),
+        version_equipos(session)
+    )
+
+def _leer_hechos(session, session_archivo, planta):
+    partes = []
+    for modelo, s in ((OrdenTrabajo, session), (OrdenTrabajoArchivo, session_archivo)):
+        filas = s.query(*[getattr(modelo, c) for c in _COLUMNAS]).filter(modelo.estado == 'Completada').all()
+        if filas:
+            partes.append(pd.DataFrame(filas, columns=_COLUMNAS))
+    df = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=_COLUMNAS)
+
+    indice = obtener_indice(planta)
+    equipos = pd.DataFrame(list(indice.por_id.values()), columns=['id', 'codigo', 'nombre', 'ubicacion'])
+
+    df = df.merge(equipos, how='left', left_on='equipo_id', right_on='id')
+    fecha = pd.to_datetime(df['fecha_fin_real']).fillna(pd.to_datetime(df['fecha_creacion']))
+
+    hechos = pd.DataFrame({
+        'tipo': df['tipo'],
+        'prioridad': df['prioridad'],
+        'tecnico': df['tecnico_asignado'].fillna('No asignado').replace('', 'No asignado'),
+        # El código es único; el nombre solo no distingue equipos homónimos
+        'equipo': (df['codigo'] + ' — ' + df['nombre']).fillna('N/A'),
+        'ubicacion': df['ubicacion'].fillna('N/A').replace('', 'N/A'),
+        'mes': fecha.dt.strftime('%Y-%m').fillna('N/A'),
+        'ordenes': 1
+    })
+    for medida in MEDIDAS[1:]:
+        hechos[medida] = df[medida].fillna(0).astype(float)
+    return hechos
+
+def _agregar(df, dimensiones):
+    if not dimensiones:
+        return df[MEDIDAS].sum().to_frame().T
+    return df.groupby(list(dimensiones), as_index=False, sort=True)[MEDIDAS].sum()
+
+def cuboide(dimensiones, planta=None):
+    """Agregado de las medidas por ``dimensiones`` (sumas, sin varianza)"""
+    planta = planta or PLANTA_PRINCIPAL
+    dimensiones = tuple(d for d in DIMENSIONES if d in dimensiones)
+
+    session = get_session(planta)
+    session_archivo = get_session_archivo(planta)
+    try:
+        version = _version(session, session_archivo)
+        with _lock:
+            clave = (planta, dimensiones, version)
+            if clave in _cache:
+                _cache.move_to_end(clave)
+                return _cache[clave]
+
+            # El cuboide en caché más pequeño que contenga las dimensiones pedidas
+            origen = None
+            for (p, dims, v), df in _cache.items():
+                if p == planta and v == version and set(dimensiones) <= set(dims):
+                    if origen is None or len(df) < len(origen):
+                        origen = df
+
+        if origen is None:
+            hechos = _hechos.get(planta)
+            if hechos is None or hechos[0] != version:
+                hechos = (version, _leer_hechos(session, session_archivo, planta))
+                _hechos[planta] = hechos
+            origen = hechos[1]
+    finally:
+        session_archivo.close()
+        session.close()
+
+    resultado = _agregar(origen, dimensiones)
+    with _lock:
+        _cache[clave] = resultado
+        _cache.move_to_end(clave)
+        while len(_cache) > TAMANO_CACHE:
+            _cache.popitem(last=False)
+    return resultado
+
+def combinar(cuboides, dimensiones):
+    """Sumar cuboides de varias plantas (las medidas son aditivas)"""
+    dimensiones = [d for d in DIMENSIONES if d in dimensiones]
+    return _agregar(pd.concat(cuboides, ignore_index=True), dimensiones)
+
+def combinar_plantas(resultados, dimensiones):
+    """Sumar los cuboides de ``resultados`` ({planta: cuboide}).
+
+    Cada planta numera sus equipos por su cuenta, así que con varias plantas
+    la etiqueta del equipo incluye la planta para no sumar equipos distintos.
+    """
+    cuboides = []
+    for planta, df in resultados.items():
+        if len(resultados) > 1 and 'equipo' in df.columns:
+            df = df.assign(equipo=planta + ' — ' + df['equipo'])
+        cuboides.append(df)
+    return combinar(cuboides, dimensiones)
+
+def con_varianza(df):
+    """Añadir desviación real vs. estimado, en valor absoluto y porcentaje"""
+    df = df.copy()
+    df['variacion_horas'] = df['horas_reales'] - df['horas_estimadas']
+    df['variacion_costo'] = df['costo_real'] - df['costo_estimado']
+    df['variacion_costo_pct'] = (df['variacion_costo'] / df['costo_estimado'].where(df['costo_estimado'] != 0)) * 100
+    return df
@@ -1,7 +1,11 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, ForeignKey, func
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, ForeignKey, func, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime, timedelta
+import json
+import os
+import threading
 
 # Configuración de la base de datos
 Base = declarative_base()
@@ -17,6 +21,7 @@ class Equipo(Base):
     estado = Column(String(20), default='Operativo')
     fecha_instalacion = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     def to_dict(self):
         return {
@@ -39,6 +44,7 @@ class OrdenTrabajo(Base):
     prioridad = Column(String(20), nullable=False)
     estado = Column(String(20), default='Pendiente')
     fecha_creacion = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     fecha_inicio_plan = Column(DateTime)
     fecha_fin_plan = Column(DateTime)
     fecha_inicio_real = Column(DateTime)
@@ -78,6 +84,7 @@ class AvisoAveria(Base):
     codigo = Column(String(50), unique=True, nullable=False)
     descripcion = Column(Text, nullable=False)
     fecha_reporte = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     reportado_por = Column(String(100), nullable=False)
     prioridad = Column(String(20), nullable=False)
     estado = Column(String(20), default='Reportado')
@@ -99,17 +106,184 @@ class AvisoAveria(Base):
             'equipo_nombre': self.equipo.nombre if self.equipo else None
         }
 
-# Configuración de la base de datos
-engine = create_engine('sqlite:///mantenimiento.db', echo=False)
-Base.metadata.create_all(engine)
-Session = sessionmaker(bind=engine)
+class ReporteJob(Base):
+    __tablename__ = 'reportes_jobs'
+    
+    id = Column(Integer, primary_key=True)
+    reporte = Column(String(50), nullable=False)
+    formato = Column(String(10), nullable=False)
+    planta = Column(String(100))
+    dias = Column(Integer, default=7)
+    estado = Column(String(20), default='Pendiente', index=True)
+    fecha_solicitud = Column(DateTime, default=datetime.utcnow)
+    fecha_inicio = Column(DateTime)
+    fecha_fin = Column(DateTime)
+    archivo = Column(String(255))
+    error = Column(Text)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'reporte': self.reporte,
+            'formato': self.formato,
+            'planta': self.planta,
+            'dias': self.dias,
+            'estado': self.estado,
+            'fecha_solicitud': self.fecha_solicitud.isoformat(),
+            'fecha_fin': self.fecha_fin.isoformat() if self.fecha_fin else None,
+            'archivo': self.archivo
+        }
+
+# Almacenamiento de archivo (órdenes y avisos cerrados)
+ArchivoBase = declarative_base()
+
+class OrdenTrabajoArchivo(ArchivoBase):
+    __tablename__ = 'ordenes_trabajo_archivo'
+    
+    id = Column(Integer, primary_key=True)
+    codigo = Column(String(50), unique=True, nullable=False)
+    descripcion = Column(Text, nullable=False)
+    tipo = Column(String(20), nullable=False)
+    prioridad = Column(String(20), nullable=False)
+    estado = Column(String(20))
+    fecha_creacion = Column(DateTime)
+    fecha_inicio_plan = Column(DateTime)
+    fecha_fin_plan = Column(DateTime)
+    fecha_inicio_real = Column(DateTime)
+    fecha_fin_real = Column(DateTime)
+    tecnico_asignado = Column(String(100))
+    horas_estimadas = Column(Float)
+    horas_reales = Column(Float)
+    costo_estimado = Column(Float)
+    costo_real = Column(Float)
+    observaciones = Column(Text)
+    equipo_id = Column(Integer, index=True)
+    aviso_id = Column(Integer)
+    
+    # Fecha de cierre usada para decidir el archivado y acotar las consultas
+    fecha_referencia = Column(DateTime, index=True, nullable=False)
+    fecha_archivado = Column(DateTime, default=datetime.utcnow)
+
+class AvisoAveriaArchivo(ArchivoBase):
+    __tablename__ = 'avisos_averias_archivo'
+    
+    id = Column(Integer, primary_key=True)
+    codigo = Column(String(50), unique=True, nullable=False)
+    descripcion = Column(Text, nullable=False)
+    fecha_reporte = Column(DateTime)
+    reportado_por = Column(String(100), nullable=False)
+    prioridad = Column(String(20), nullable=False)
+    estado = Column(String(20))
+    fecha_cierre = Column(DateTime)
+    observaciones = Column(Text)
+    equipo_id = Column(Integer, index=True)
+    
+    fecha_referencia = Column(DateTime, index=True, nullable=False)
+    fecha_archivado = Column(DateTime, default=datetime.utcnow)
+
+# Configuración de plantas (una base de datos por planta)
+#
+# MANTENIMIENTO_PLANTAS admite un JSON como:
+#   {"Planta Norte": {"url": "sqlite:///planta_norte.db", "ubicaciones": ["Sala de Máquinas"]},
+#    "Planta Sur": {"url": "sqlite:///planta_sur.db"}}
+# La primera planta es la principal. Sin configurar, hay una sola planta
+# sobre mantenimiento.db.
+def _cargar_plantas():
+    configuracion = os.environ.get('MANTENIMIENTO_PLANTAS')
+    if not configuracion:
+        return {'Principal': {'url': 'sqlite:///mantenimiento.db', 'ubicaciones': []}}
+    
+    plantas = {}
+    for nombre, datos in json.loads(configuracion).items():
+        if isinstance(datos, str):
+            datos = {'url': datos}
+        plantas[nombre] = {
+            'url': datos['url'],
+            'url_archivo': datos.get('url_archivo'),
+            'ubicaciones': datos.get('ubicaciones', [])
+        }
+    return plantas
+
+PLANTAS = _cargar_plantas()
+PLANTA_PRINCIPAL = next(iter(PLANTAS))
+
+def _url_archivo(planta):
+    datos = PLANTAS[planta]
+    if datos.get('url_archivo'):
+        return datos['url_archivo']
+    url = datos['url']
+    return url[:-3] + '_archivo.db' if url.endswith('.db') else url + '_archivo'
+
+_sessions = {}
+_sessions_archivo = {}
+_lock = threading.Lock()
+
+def _columnas(engine_planta, tabla):
+    return {c['name'] for c in inspect(engine_planta).get_columns(tabla)}
+
+def _migrar(engine_planta):
+    """Añadir updated_at a bases creadas antes de que existiera la columna.
+
+    El servidor de Streamlit y los procesos de reportes pueden migrar la
+    misma base a la vez: si otro proceso ya añadió la columna no es un error.
+    """
+    for tabla in ('equipos', 'ordenes_trabajo', 'avisos_averias'):
+        if 'updated_at' in _columnas(engine_planta, tabla):
+            continue
+        try:
+            with engine_planta.begin() as conexion:
+                conexion.execute(text(f"ALTER TABLE {tabla} ADD COLUMN updated_at DATETIME"))
+        except OperationalError:
+            if 'updated_at' not in _columnas(engine_planta, tabla):
+                raise
+        with engine_planta.begin() as conexion:
+            conexion.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{tabla}_updated_at ON {tabla} (updated_at)"))
+
+def _crear_tablas(engine_planta, base):
+    try:
+        base.metadata.create_all(engine_planta)
+    except OperationalError:
+        # Otro proceso creó alguna tabla entre la comprobación y el CREATE
+        base.metadata.create_all(engine_planta)
+
+def _sessionmaker(planta, cache, url, base):
+    planta = planta or PLANTA_PRINCIPAL
+    if planta not in PLANTAS:
+        raise KeyError(f"Planta desconocida: {planta}")
+    
+    if planta not in cache:
+        with _lock:
+            if planta not in cache:
+                engine_planta = create_engine(url(planta), echo=False)
+                _crear_tablas(engine_planta, base)
+                if base is Base:
+                    _migrar(engine_planta)
+                cache[planta] = sessionmaker(bind=engine_planta)
+    return cache[planta]
+
+def get_session(planta=None):
+    """Sesión sobre la base de datos de ``planta`` (la principal por defecto)"""
+    return _sessionmaker(planta, _sessions, lambda p: PLANTAS[p]['url'], Base)()
+
+def get_session_archivo(planta=None):
+    """Sesión sobre la base de archivo de ``planta``"""
+    return _sessionmaker(planta, _sessions_archivo, _url_archivo, ArchivoBase)()
+
+def planta_de_ubicacion(ubicacion):
+    """Planta propietaria de una ubicación según los prefijos configurados"""
+    ubicacion = (ubicacion or '').lower()
+    for planta, datos in PLANTAS.items():
+        if any(ubicacion.startswith(prefijo.lower()) for prefijo in datos['ubicaciones']):
+            return planta
+    return None
 
-def get_session():
-    return Session()
+# Compatibilidad: motor y sesiones de la planta principal
+Session = _sessionmaker(PLANTA_PRINCIPAL, _sessions, lambda p: PLANTAS[p]['url'], Base)
+engine = Session.kw['bind']
 
-def inicializar_datos():
+def inicializar_datos(planta=None):
     """Inicializar datos de ejemplo"""
-    session = get_session()
+    session = get_session(planta)
     
     try:
         # Verificar si ya existen datos
@@ -0,0 +1,172 @@
+"""Caché incremental del dashboard basada en marcas de agua.
+
+Cada tabla se resume en una marca de agua barata (número de filas, id
+máximo y updated_at máximo). Si la marca no cambió desde la última
+lectura se reutilizan los DataFrames en memoria; si cambió, solo se leen
+las filas nuevas o modificadas y se fusionan por id. Si tras fusionar el
+número de filas en memoria no coincide con el de la tabla, hubo borrados
+(por ejemplo al archivar) y se hace una recarga completa.
+
+Los totales de órdenes suman además los conteos agrupados del archivo,
+que solo se recalculan cuando cambia su propia marca (filas e id máximo).
+"""
+import threading
+from collections import Counter
+import pandas as pd
+from sqlalchemy import func, or_
+from database import get_session_archivo, OrdenTrabajo, OrdenTrabajoArchivo, AvisoAveria, PLANTA_PRINCIPAL
+from archivo import conteo_archivo
+from indice_equipos import obtener_indice
+
+ESTADOS_AVISO_ACTIVO = ['Reportado', 'En Análisis']
+PRIORIDADES_CRITICAS = ['Alta', 'Crítica']
+
+class TablaIncremental:
+    def __init__(self, modelo, columnas):
+        self.modelo = modelo
+        self.columnas = ['id'] + columnas
+        self.marca = None
+        self.df = pd.DataFrame(columns=self.columnas).set_index('id')
+        self._lock = threading.Lock()
+
+    def _marca(self, session):
+        return tuple(session.query(
+            func.count(self.modelo.id), func.max(self.modelo.id), func.max(self.modelo.updated_at)
+        ).one())
+
+    def _leer(self, session, filtro=None):
+        query = session.query(*[getattr(self.modelo, c) for c in self.columnas])
+        if filtro is not None:
+            query = query.filter(filtro)
+        return pd.DataFrame(query.all(), columns=self.columnas).set_index('id')
+
+    def actualizar(self, session):
+        """Sincronizar con la base de datos; devuelve True si hubo cambios"""
+        with self._lock:
+            marca = self._marca(session)
+            if marca == self.marca:
+                return False
+
+            total, max_id, max_updated = marca
+            if self.marca is None or total < self.marca[0]:
+                self.df = self._leer(session)
+            else:
+                _, max_id_anterior, max_updated_anterior = self.marca
+                condiciones = [self.modelo.id > (max_id_anterior or 0)]
+                if max_updated_anterior is not None:
+                    condiciones.append(self.modelo.updated_at >= max_updated_anterior)
+                else:
+                    condiciones.append(self.modelo.updated_at.isnot(None))
+                cambios = self._leer(session, or_(*condiciones))
+                self.df = pd.concat([self.df.drop(cambios.index, errors='ignore'), cambios])
+                # Los borrados no dejan rastro en la marca si entran tantas filas
+                # como salen: el recuento tras fusionar los delata
+                if len(self.df) != total:
+                    self.df = self._leer(session)
+
+            self.marca = marca
+            return True
+
+_tablas = {}
+_resultados = {}
+_archivadas = {}
+_lock = threading.Lock()
+
+def _tablas_planta(planta):
+    with _lock:
+        if planta not in _tablas:
+            _tablas[planta] = {
+                'ordenes': TablaIncremental(OrdenTrabajo, [
+                    'codigo', 'descripcion', 'prioridad', 'estado',
+                    'tecnico_asignado', 'fecha_creacion', 'equipo_id'
+                ]),
+                'avisos': TablaIncremental(AvisoAveria, [
+                    'codigo', 'descripcion', 'reportado_por', 'prioridad', 'estado',
+                    'fecha_reporte', 'observaciones', 'equipo_id'
+                ])
+            }
+        return _tablas[planta]
+
+def _ordenes_archivadas(planta):
+    """(marca, conteos por estado y prioridad) de las órdenes archivadas de ``planta``"""
+    session_archivo = get_session_archivo(planta)
+    try:
+        marca = tuple(session_archivo.query(
+            func.count(OrdenTrabajoArchivo.id), func.max(OrdenTrabajoArchivo.id)
+        ).one())
+    finally:
+        session_archivo.close()
+
+    actual = _archivadas.get(planta)
+    if actual is None or actual[0] != marca:
+        actual = (marca, {
+            'por_estado': conteo_archivo('estado', planta),
+            'por_prioridad': conteo_archivo('prioridad', planta)
+        })
+        _archivadas[planta] = actual
+    return actual
+
+def _nombre_equipo(indice, equipo_id):
+    datos = indice.por_id.get(equipo_id)
+    return datos['nombre'] if datos else 'N/A'
+
+def datos_dashboard(session, planta=None):
+    """Métricas, conteos y listas del dashboard a partir de la caché de ``planta``"""
+    planta = planta or PLANTA_PRINCIPAL
+    tablas = _tablas_planta(planta)
+    for tabla in tablas.values():
+        tabla.actualizar(session)
+    indice = obtener_indice(planta)
+    marca_archivo, archivadas = _ordenes_archivadas(planta)
+
+    # Sin cambios en las marcas ni en el índice de equipos no se recalcula nada
+    marcas = tuple(t.marca for t in tablas.values()) + (marca_archivo,)
+    anterior = _resultados.get(planta)
+    if anterior and anterior[0] == marcas and anterior[1] is indice:
+        return anterior[2]
+
+    datos = _calcular(tablas['ordenes'].df, tablas['avisos'].df, indice, archivadas)
+    _resultados[planta] = (marcas, indice, datos)
+    return datos
+
+def _calcular(ordenes, avisos, indice, archivadas):
+    por_estado = ordenes['estado'].value_counts()
+    # Las archivadas están cerradas: cuentan en los totales, no en pendientes ni en progreso
+    total_por_estado = Counter({k: int(v) for k, v in por_estado.items()}) + Counter(archivadas['por_estado'])
+    total_por_prioridad = (Counter({k: int(v) for k, v in ordenes['prioridad'].value_counts().items()})
+                           + Counter(archivadas['por_prioridad']))
+    recientes = ordenes.sort_values('fecha_creacion', ascending=False).head(10)
+    criticos = avisos[avisos['prioridad'].isin(PRIORIDADES_CRITICAS)].sort_values(
+        'fecha_reporte', ascending=False
+    ).head(5)
+
+    return {
+        'metricas': {
+            'total_ordenes': len(ordenes) + sum(archivadas['por_estado'].values()),
+            'ordenes_pendientes': int(por_estado.get('Pendiente', 0)),
+            'ordenes_progreso': int(por_estado.get('En Progreso', 0)),
+            'avisos_activos': int(avisos['estado'].isin(ESTADOS_AVISO_ACTIVO).sum()),
+            'total_equipos': len(indice)
+        },
+        'por_estado': dict(total_por_estado),
+        'por_prioridad': dict(total_por_prioridad),
+        'recientes': [{
+            'Código': orden.codigo,
+            'Descripción': orden.descripcion,
+            'Equipo': _nombre_equipo(indice, orden.equipo_id),
+            'Prioridad': orden.prioridad,
+            'Estado': orden.estado,
+            'Técnico': orden.tecnico_asignado or 'No asignado',
+            'Fecha Creación': orden.fecha_creacion
+        } for orden in recientes.itertuples()],
+        'criticos': [{
+            'codigo': aviso.codigo,
+            'descripcion': aviso.descripcion,
+            'equipo': _nombre_equipo(indice, aviso.equipo_id),
+            'reportado_por': aviso.reportado_por,
+            'prioridad': aviso.prioridad,
+            'estado': aviso.estado,
+            'fecha_reporte': aviso.fecha_reporte,
+            'observaciones': aviso.observaciones
+        } for aviso in criticos.itertuples()]
+    }
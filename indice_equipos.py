@@ -0,0 +1,134 @@
+"""Índice en memoria de equipos para búsquedas y selectores.
+
+El índice se construye una vez por proceso y solo se reconstruye cuando
+cambia la versión de la tabla de equipos (número de filas, id máximo y
+updated_at más reciente), así que altas, bajas y ediciones lo invalidan.
+"""
+import threading
+import unicodedata
+from bisect import bisect_left
+from sqlalchemy import func
+import streamlit as st
+from database import get_session, Equipo, PLANTA_PRINCIPAL
+
+LIMITE_RESULTADOS = 50
+
+def normalizar(texto):
+    """Minúsculas y sin tildes, para comparar 'Máquinas' con 'maquinas'"""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower().strip()
+
+class IndiceEquipos:
+    def __init__(self, equipos):
+        self.por_id = {}
+        self.por_codigo = {}
+        self._texto = {}
+        claves = []
+
+        for eq in equipos:
+            datos = {
+                'id': eq.id,
+                'codigo': eq.codigo,
+                'nombre': eq.nombre,
+                'ubicacion': eq.ubicacion,
+                'estado': eq.estado
+            }
+            self.por_id[eq.id] = datos
+            self.por_codigo[eq.codigo] = datos
+            campos = [normalizar(eq.codigo), normalizar(eq.nombre), normalizar(eq.ubicacion)]
+            self._texto[eq.id] = ' '.join(campos)
+
+            # Prefijos por campo completo y por palabra ("bomba", "d-15", ...)
+            for prioridad, campo in enumerate(campos):
+                for palabra in {campo, *campo.split()}:
+                    if palabra:
+                        claves.append((palabra, prioridad, eq.id))
+
+        claves.sort()
+        self._orden = sorted(self.por_id, key=lambda i: self.por_id[i]['codigo'])
+        self._claves = claves
+        self._palabras = [c[0] for c in claves]
+
+    def __len__(self):
+        return len(self.por_id)
+
+    def etiqueta(self, equipo_id):
+        datos = self.por_id.get(equipo_id)
+        if not datos:
+            return 'N/A'
+        if datos['ubicacion']:
+            return f"{datos['codigo']} — {datos['nombre']} ({datos['ubicacion']})"
+        return f"{datos['codigo']} — {datos['nombre']}"
+
+    def buscar(self, texto, limite=LIMITE_RESULTADOS):
+        """Ids de los equipos que coinciden con ``texto``, los mejores primero.
+
+        Primero las coincidencias por prefijo (código, luego nombre, luego
+        ubicación) y después las coincidencias por subcadena.
+        """
+        texto = normalizar(texto)
+        if not texto:
+            return self._orden[:limite]
+
+        encontrados = {}
+        inicio = bisect_left(self._palabras, texto)
+        for palabra, prioridad, equipo_id in self._claves[inicio:]:
+            if not palabra.startswith(texto):
+                break
+            if prioridad < encontrados.get(equipo_id, 99):
+                encontrados[equipo_id] = prioridad
+
+        resultados = sorted(encontrados, key=lambda i: (encontrados[i], self.por_id[i]['codigo']))
+        if len(resultados) >= limite:
+            return resultados[:limite]
+
+        for equipo_id in self._orden:
+            if equipo_id not in encontrados and texto in self._texto[equipo_id]:
+                resultados.append(equipo_id)
+                if len(resultados) >= limite:
+                    break
+        return resultados
+
+_indices = {}
+_lock = threading.Lock()
+
+def version_equipos(session):
+    return tuple(session.query(
+        func.count(Equipo.id), func.max(Equipo.id), func.max(Equipo.updated_at)
+    ).one())
+
+def obtener_indice(planta=None):
+    """Índice de equipos vigente de ``planta``, reconstruido solo si la tabla cambió"""
+    planta = planta or PLANTA_PRINCIPAL
+    session = get_session(planta)
+    try:
+        version = version_equipos(session)
+        with _lock:
+            actual = _indices.get(planta)
+            if actual is None or actual[0] != version:
+                actual = (version, IndiceEquipos(session.query(Equipo).all()))
+                _indices[planta] = actual
+            return actual[1]
+    finally:
+        session.close()
+
+def selector_equipo(etiqueta, key, incluir_todos=False, limite=LIMITE_RESULTADOS, planta=None):
+    """Buscador + selectbox que solo envía al navegador los ``limite`` mejores resultados.
+
+    Devuelve el id del equipo seleccionado (None si no hay selección o se
+    eligió "Todos").
+    """
+    indice = obtener_indice(planta)
+    busqueda = st.text_input(f"Buscar {etiqueta.lower()}", key=f"{key}_busqueda",
+                             placeholder="Código, nombre o ubicación")
+    opciones = indice.buscar(busqueda, limite)
+    if len(opciones) == limite and len(indice) > limite:
+        st.caption(f"Mostrando {limite} de {len(indice)} equipos, refine la búsqueda")
+
+    # Las etiquetas incluyen el código, que es único, así que sirven de opción
+    opciones = {indice.etiqueta(i): i for i in opciones}
+    if incluir_todos:
+        opciones = {"Todos": None, **opciones}
+
+    seleccion = st.selectbox(etiqueta, options=list(opciones.keys()), key=key)
+    return opciones.get(seleccion)
@@ -1,26 +1,30 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from database import get_session, OrdenTrabajo, Equipo
+from sqlalchemy.orm import joinedload
+from database import get_session, OrdenTrabajo
+from indice_equipos import selector_equipo
+from plantas import selector_planta
 
 st.set_page_config(page_title="Órdenes de Trabajo", layout="wide")
 
 st.title("📋 Gestión de Órdenes de Trabajo")
 
-# Session
-session = get_session()
+# Session (las órdenes se guardan en la planta de su equipo)
+planta = selector_planta()
+session = get_session(planta)
 
 # Formulario para nueva orden
+st.subheader("Crear Nueva Orden de Trabajo")
+
+# El buscador de equipos va fuera del formulario para filtrar mientras se escribe
+equipo_seleccionado = selector_equipo("Equipo", key="nueva_orden_equipo", planta=planta)
+
 with st.form("nueva_orden"):
-    st.subheader("Crear Nueva Orden de Trabajo")
-    
     col1, col2 = st.columns(2)
     
     with col1:
         descripcion = st.text_area("Descripción del trabajo", height=100)
-        equipos = session.query(Equipo).all()
-        equipo_options = {eq.nombre: eq.id for eq in equipos}
-        equipo_seleccionado = st.selectbox("Equipo", options=list(equipo_options.keys()))
         tipo = st.selectbox("Tipo", ["Preventivo", "Correctivo", "Predictivo"])
         
     with col2:
@@ -42,7 +46,7 @@ with st.form("nueva_orden"):
                 descripcion=descripcion,
                 tipo=tipo,
                 prioridad=prioridad,
-                equipo_id=equipo_options[equipo_seleccionado],
+                equipo_id=equipo_seleccionado,
                 tecnico_asignado=tecnico_asignado,
                 fecha_inicio_plan=datetime.combine(fecha_inicio, datetime.min.time()),
                 fecha_fin_plan=datetime.combine(fecha_fin, datetime.min.time())
@@ -63,11 +67,10 @@ with col1:
 with col2:
     filtro_prioridad = st.selectbox("Prioridad", ["Todas", "Baja", "Media", "Alta", "Crítica"])
 with col3:
-    equipos_filtro = ["Todos"] + [eq.nombre for eq in session.query(Equipo).all()]
-    filtro_equipo = st.selectbox("Equipo", equipos_filtro)
+    filtro_equipo = selector_equipo("Equipo", key="filtro_equipo", incluir_todos=True, planta=planta)
 
 # Aplicar filtros
-query = session.query(OrdenTrabajo)
+query = session.query(OrdenTrabajo).options(joinedload(OrdenTrabajo.equipo))
 
 if filtro_estado != "Todos":
     query = query.filter(OrdenTrabajo.estado == filtro_estado)
@@ -75,8 +78,8 @@ if filtro_estado != "Todos":
 if filtro_prioridad != "Todas":
     query = query.filter(OrdenTrabajo.prioridad == filtro_prioridad)
 
-if filtro_equipo != "Todos":
-    query = query.join(Equipo).filter(Equipo.nombre == filtro_equipo)
+if filtro_equipo is not None:
+    query = query.filter(OrdenTrabajo.equipo_id == filtro_equipo)
 
 # Mostrar órdenes
 ordenes = query.order_by(OrdenTrabajo.fecha_creacion.desc()).all()
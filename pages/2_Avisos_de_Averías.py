@@ -1,25 +1,30 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from database import get_session, AvisoAveria, Equipo, OrdenTrabajo
+from sqlalchemy.orm import joinedload
+from database import get_session, AvisoAveria, OrdenTrabajo
+from indice_equipos import selector_equipo
+from plantas import selector_planta
 
 st.set_page_config(page_title="Avisos de Averías", layout="wide")
 
 st.title("⚠️ Avisos de Averías")
 
-session = get_session()
+# Los avisos se guardan en la planta de su equipo
+planta = selector_planta()
+session = get_session(planta)
 
 # Formulario para nuevo aviso
+st.subheader("Reportar Nueva Avería")
+
+# El buscador de equipos va fuera del formulario para filtrar mientras se escribe
+equipo_seleccionado = selector_equipo("Equipo afectado", key="nuevo_aviso_equipo", planta=planta)
+
 with st.form("nuevo_aviso"):
-    st.subheader("Reportar Nueva Avería")
-    
     col1, col2 = st.columns(2)
     
     with col1:
         descripcion = st.text_area("Descripción de la avería", height=100)
-        equipos = session.query(Equipo).all()
-        equipo_options = {eq.nombre: eq.id for eq in equipos}
-        equipo_seleccionado = st.selectbox("Equipo afectado", options=list(equipo_options.keys()))
         
     with col2:
         reportado_por = st.text_input("Reportado por")
@@ -39,7 +44,7 @@ with st.form("nuevo_aviso"):
                 descripcion=descripcion,
                 reportado_por=reportado_por,
                 prioridad=prioridad,
-                equipo_id=equipo_options[equipo_seleccionado],
+                equipo_id=equipo_seleccionado,
                 observaciones=observaciones
             )
             
@@ -53,7 +58,7 @@ with st.form("nuevo_aviso"):
 # Mostrar avisos
 st.subheader("Avisos de Averías Activos")
 
-avisos = session.query(AvisoAveria).order_by(AvisoAveria.fecha_reporte.desc()).all()
+avisos = session.query(AvisoAveria).options(joinedload(AvisoAveria.equipo)).order_by(AvisoAveria.fecha_reporte.desc()).all()
 
 if avisos:
     datos = []
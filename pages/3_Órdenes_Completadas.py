@@ -1,50 +1,55 @@
 import streamlit as st
 import pandas as pd
-from database import get_session, OrdenTrabajo
+from datetime import datetime, date, timedelta
+from archivo import ordenes_completadas
+from plantas import consultar_plantas, concatenar, plantas_de, selector_planta
 
 st.set_page_config(page_title="Órdenes Completadas", layout="wide")
 
 st.title("✅ Órdenes de Trabajo Completadas")
 
-session = get_session()
+planta = selector_planta(incluir_todas=True)
 
-# Obtener órdenes completadas
-ordenes = session.query(OrdenTrabajo).filter_by(estado="Completada").order_by(
-    OrdenTrabajo.fecha_fin_real.desc()
-).all()
+# Rango de fechas (el archivo solo se consulta si el rango lo alcanza)
+fecha_desde = st.date_input("Completadas desde", value=date.today() - timedelta(days=365))
+desde = datetime.combine(fecha_desde, datetime.min.time())
 
-if ordenes:
+def consultar_completadas(session, planta):
+    return [{
+        'Código': orden.codigo,
+        'Descripción': orden.descripcion,
+        'Equipo': orden.equipo.nombre if orden.equipo else 'N/A',
+        'Tipo': orden.tipo,
+        'Técnico': orden.tecnico_asignado or 'No asignado',
+        'Horas Reales': orden.horas_reales or 0,
+        'Costo Real': orden.costo_real or 0,
+        'Fecha Inicio': orden.fecha_inicio_real.strftime('%d/%m/%Y') if orden.fecha_inicio_real else 'N/A',
+        'Fecha Fin': orden.fecha_fin_real.strftime('%d/%m/%Y') if orden.fecha_fin_real else 'N/A',
+        'fin_real': orden.fecha_fin_real or datetime.min
+    } for orden in ordenes_completadas(session, desde=desde, planta=planta)]
+
+# Obtener órdenes completadas (en paralelo si hay varias plantas)
+datos = concatenar(consultar_plantas(consultar_completadas, plantas_de(planta)),
+                   orden=lambda o: o['fin_real'])
+
+if datos:
     # Métricas
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        total_completadas = len(ordenes)
+        total_completadas = len(datos)
         st.metric("Total Completadas", total_completadas)
     
     with col2:
-        avg_horas = sum(o.horas_reales or 0 for o in ordenes) / len(ordenes) if ordenes else 0
+        avg_horas = sum(o['Horas Reales'] for o in datos) / len(datos)
         st.metric("Promedio Horas", f"{avg_horas:.1f}")
     
     with col3:
-        total_costo = sum(o.costo_real or 0 for o in ordenes)
+        total_costo = sum(o['Costo Real'] for o in datos)
         st.metric("Costo Total", f"${total_costo:,.2f}")
     
     # Tabla de órdenes completadas
-    datos = []
-    for orden in ordenes:
-        datos.append({
-            'Código': orden.codigo,
-            'Descripción': orden.descripcion,
-            'Equipo': orden.equipo.nombre if orden.equipo else 'N/A',
-            'Tipo': orden.tipo,
-            'Técnico': orden.tecnico_asignado or 'No asignado',
-            'Horas Reales': orden.horas_reales or 0,
-            'Costo Real': orden.costo_real or 0,
-            'Fecha Inicio': orden.fecha_inicio_real.strftime('%d/%m/%Y') if orden.fecha_inicio_real else 'N/A',
-            'Fecha Fin': orden.fecha_fin_real.strftime('%d/%m/%Y') if orden.fecha_fin_real else 'N/A'
-        })
-    
-    df = pd.DataFrame(datos)
+    df = pd.DataFrame(datos).drop(columns='fin_real')
     st.dataframe(df, use_container_width=True)
     
     # Exportar datos
@@ -57,6 +62,4 @@ if ordenes:
             mime="text/csv"
         )
 else:
-    st.info("No hay órdenes completadas registradas")
-
-session.close()
\ No newline at end of file
+    st.info("No hay órdenes completadas registradas")
\ No newline at end of file
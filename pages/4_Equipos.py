@@ -1,12 +1,18 @@
 import streamlit as st
 import pandas as pd
-from database import get_session, Equipo, OrdenTrabajo
+from datetime import datetime, date, timedelta
+from sqlalchemy import func
+from database import get_session, planta_de_ubicacion, Equipo, OrdenTrabajo
+from archivo import conteo_archivo, historial_equipo
+from indice_equipos import selector_equipo
+from plantas import selector_planta
 
 st.set_page_config(page_title="Gestión de Equipos", layout="wide")
 
 st.title("🏭 Gestión de Equipos")
 
-session = get_session()
+planta = selector_planta()
+session = get_session(planta)
 
 # Formulario para nuevo equipo
 with st.form("nuevo_equipo"):
@@ -26,8 +32,12 @@ with st.form("nuevo_equipo"):
     
     if submitted:
         if nombre:
+            # La ubicación puede pertenecer a otra planta según la configuración
+            planta_destino = planta_de_ubicacion(ubicacion) or planta
+            session_destino = get_session(planta_destino) if planta_destino != planta else session
+            
             # Generar código
-            ultimo_equipo = session.query(Equipo).order_by(Equipo.id.desc()).first()
+            ultimo_equipo = session_destino.query(Equipo).order_by(Equipo.id.desc()).first()
             nuevo_codigo = f"EQ-{ultimo_equipo.id + 1:05d}" if ultimo_equipo else "EQ-00001"
             
             nuevo_equipo = Equipo(
@@ -38,9 +48,11 @@ with st.form("nuevo_equipo"):
                 estado=estado
             )
             
-            session.add(nuevo_equipo)
-            session.commit()
-            st.success(f"Equipo {nuevo_codigo} registrado exitosamente!")
+            session_destino.add(nuevo_equipo)
+            session_destino.commit()
+            if session_destino is not session:
+                session_destino.close()
+            st.success(f"Equipo {nuevo_codigo} registrado exitosamente en {planta_destino}!")
             st.rerun()
         else:
             st.error("El nombre del equipo es requerido")
@@ -51,11 +63,20 @@ st.subheader("Lista de Equipos")
 equipos = session.query(Equipo).order_by(Equipo.nombre).all()
 
 if equipos:
+    # Contar órdenes por equipo (una consulta agrupada en lugar de dos por equipo)
+    conteo_ordenes = dict(session.query(
+        OrdenTrabajo.equipo_id, func.count(OrdenTrabajo.id)
+    ).group_by(OrdenTrabajo.equipo_id).all())
+    # El total incluye las órdenes archivadas, como el historial
+    conteo_archivadas = conteo_archivo('equipo_id', planta)
+    conteo_activas = dict(session.query(
+        OrdenTrabajo.equipo_id, func.count(OrdenTrabajo.id)
+    ).filter_by(estado="En Progreso").group_by(OrdenTrabajo.equipo_id).all())
+    
     datos = []
     for equipo in equipos:
-        # Contar órdenes por equipo
-        ordenes_count = session.query(OrdenTrabajo).filter_by(equipo_id=equipo.id).count()
-        ordenes_activas = session.query(OrdenTrabajo).filter_by(equipo_id=equipo.id, estado="En Progreso").count()
+        ordenes_count = conteo_ordenes.get(equipo.id, 0) + conteo_archivadas.get(equipo.id, 0)
+        ordenes_activas = conteo_activas.get(equipo.id, 0)
         
         datos.append({
             'Código': equipo.codigo,
@@ -72,13 +93,10 @@ if equipos:
     
     # Detalles del equipo seleccionado
     st.subheader("Detalles del Equipo")
-    equipo_seleccionado = st.selectbox(
-        "Seleccionar equipo para ver detalles",
-        options=[e.codigo for e in equipos]
-    )
+    equipo_seleccionado = selector_equipo("Seleccionar equipo para ver detalles", key="detalle_equipo", planta=planta)
     
     if equipo_seleccionado:
-        equipo = session.query(Equipo).filter_by(codigo=equipo_seleccionado).first()
+        equipo = session.get(Equipo, equipo_seleccionado)
         if equipo:
             col1, col2 = st.columns(2)
             with col1:
@@ -94,9 +112,10 @@ if equipos:
             
             # Historial de órdenes del equipo
             st.subheader("Historial de Órdenes")
-            ordenes_equipo = session.query(OrdenTrabajo).filter_by(equipo_id=equipo.id).order_by(
-                OrdenTrabajo.fecha_creacion.desc()
-            ).all()
+            historial_desde = st.date_input("Mostrar historial desde", value=date.today() - timedelta(days=365))
+            ordenes_equipo = historial_equipo(
+                session, equipo.id, desde=datetime.combine(historial_desde, datetime.min.time()), planta=planta
+            )
             
             if ordenes_equipo:
                 datos_ordenes = []
@@ -0,0 +1,77 @@
+import streamlit as st
+import pandas as pd
+import os
+from database import get_session, ReporteJob
+from plantas import selector_planta, TODAS
+from reportes import REPORTES, FORMATOS, solicitar_reporte
+
+st.set_page_config(page_title="Reportes", layout="wide")
+
+st.title("📑 Reportes")
+
+planta = selector_planta(incluir_todas=True)
+
+# Los reportes se generan fuera de Streamlit: la página solo los encola
+with st.form("nuevo_reporte"):
+    st.subheader("Solicitar Reporte")
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        titulos = {titulo: clave for clave, (titulo, _) in REPORTES.items()}
+        reporte = titulos[st.selectbox("Reporte", list(titulos.keys()))]
+    with col2:
+        formato = st.selectbox("Formato", list(FORMATOS.keys()))
+    with col3:
+        dias = st.number_input("Periodo (días)", min_value=1, max_value=365, value=7)
+
+    submitted = st.form_submit_button("Solicitar Reporte")
+
+    if submitted:
+        job_id = solicitar_reporte(reporte, formato, None if planta == TODAS else planta, int(dias))
+        st.success(f"Reporte #{job_id} en cola. Se generará en segundo plano.")
+
+st.caption("Los reportes los procesa el servidor de reportes: `python reportes.py`")
+
+# Trabajos recientes
+st.subheader("Reportes Generados")
+
+session = get_session()
+jobs = session.query(ReporteJob).order_by(ReporteJob.id.desc()).limit(50).all()
+session.close()
+
+if jobs:
+    datos = []
+    for job in jobs:
+        datos.append({
+            'ID': job.id,
+            'Reporte': REPORTES[job.reporte][0] if job.reporte in REPORTES else job.reporte,
+            'Formato': job.formato,
+            'Planta': job.planta or TODAS,
+            'Días': job.dias,
+            'Estado': job.estado,
+            'Solicitado': job.fecha_solicitud.strftime('%d/%m/%Y %H:%M'),
+            'Finalizado': job.fecha_fin.strftime('%d/%m/%Y %H:%M') if job.fecha_fin else '',
+            'Error': job.error or ''
+        })
+
+    df = pd.DataFrame(datos)
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+    # Descarga: solo se lee del disco el archivo seleccionado
+    completados = {f"#{j.id} - {REPORTES.get(j.reporte, (j.reporte,))[0]} ({j.formato})": j
+                   for j in jobs if j.estado == 'Completado' and j.archivo and os.path.exists(j.archivo)}
+
+    if completados:
+        seleccion = st.selectbox("Seleccionar reporte para descargar", list(completados.keys()))
+        job = completados[seleccion]
+        with open(job.archivo, 'rb') as f:
+            st.download_button(
+                label="⬇️ Descargar",
+                data=f.read(),
+                file_name=os.path.basename(job.archivo),
+                mime="text/html" if job.formato == 'HTML' else
+                     "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
+else:
+    st.info("No hay reportes solicitados")
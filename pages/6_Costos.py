@@ -0,0 +1,83 @@
+import streamlit as st
+import plotly.express as px
+from cubo import DIMENSIONES, cuboide, combinar, combinar_plantas, con_varianza
+from plantas import consultar_plantas, plantas_de, selector_planta
+
+st.set_page_config(page_title="Análisis de Costos", layout="wide")
+
+st.title("💰 Análisis de Costos y Horas")
+
+planta = selector_planta(incluir_todas=True)
+plantas = plantas_de(planta)
+
+def obtener_cuboide(dimensiones):
+    """Cuboide de la selección de plantas (las plantas se consultan en paralelo)"""
+    resultados = consultar_plantas(lambda session, p: cuboide(dimensiones, p), plantas)
+    return combinar_plantas(resultados, dimensiones)
+
+# Dimensiones de análisis (el orden define la jerarquía del drill-down)
+etiquetas = {etiqueta: clave for clave, etiqueta in DIMENSIONES.items()}
+agrupar = st.multiselect("Agrupar por", list(etiquetas.keys()), default=["Tipo"])
+dimensiones = [etiquetas[e] for e in agrupar]
+
+# Filtros: cada uno añade su dimensión al cuboide y se agrega después
+filtros = {}
+with st.expander("Filtrar"):
+    columnas = st.columns(3)
+    for i, (clave, etiqueta) in enumerate(DIMENSIONES.items()):
+        with columnas[i % 3]:
+            valores = ["Todos"] + obtener_cuboide([clave])[clave].tolist()
+            valor = st.selectbox(etiqueta, valores, key=f"filtro_{clave}")
+            if valor != "Todos":
+                filtros[clave] = valor
+
+df = obtener_cuboide(dimensiones + [d for d in filtros if d not in dimensiones])
+for clave, valor in filtros.items():
+    df = df[df[clave] == valor]
+df = con_varianza(combinar([df], dimensiones))
+
+if df['ordenes'].sum() > 0:
+    # Métricas
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("Órdenes Completadas", int(df['ordenes'].sum()))
+
+    with col2:
+        st.metric("Horas Reales", f"{df['horas_reales'].sum():,.1f}",
+                  delta=f"{df['variacion_horas'].sum():+,.1f} vs. estimado", delta_color="inverse")
+
+    with col3:
+        st.metric("Costo Estimado", f"${df['costo_estimado'].sum():,.2f}")
+
+    with col4:
+        st.metric("Costo Real", f"${df['costo_real'].sum():,.2f}",
+                  delta=f"{df['variacion_costo'].sum():+,.2f} vs. estimado", delta_color="inverse")
+
+    # Gráfico por la primera dimensión
+    if dimensiones:
+        st.subheader(f"Costo Estimado vs. Real por {DIMENSIONES[dimensiones[0]]}")
+        df_grafico = combinar([df], dimensiones[:1]).melt(
+            id_vars=dimensiones[0], value_vars=['costo_estimado', 'costo_real'],
+            var_name='Medida', value_name='Costo'
+        )
+        df_grafico['Medida'] = df_grafico['Medida'].map({'costo_estimado': 'Estimado', 'costo_real': 'Real'})
+        fig = px.bar(df_grafico, x=dimensiones[0], y='Costo', color='Medida', barmode='group',
+                     labels={dimensiones[0]: DIMENSIONES[dimensiones[0]]})
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Tabla
+    tabla = df.rename(columns={
+        **DIMENSIONES,
+        'ordenes': 'Órdenes',
+        'horas_estimadas': 'Horas Estimadas',
+        'horas_reales': 'Horas Reales',
+        'variacion_horas': 'Variación Horas',
+        'costo_estimado': 'Costo Estimado',
+        'costo_real': 'Costo Real',
+        'variacion_costo': 'Variación Costo',
+        'variacion_costo_pct': 'Variación Costo %'
+    })
+    st.dataframe(tabla, use_container_width=True, hide_index=True)
+else:
+    st.info("No hay órdenes completadas para la selección")
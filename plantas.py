@@ -0,0 +1,69 @@
+"""Consultas sobre varias plantas en paralelo.
+
+Cada planta tiene su propia base de datos (ver ``PLANTAS`` en database.py).
+Las vistas de flota lanzan la misma consulta en cada planta sobre un pool
+de hilos y combinan los resultados parciales.
+"""
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from database import get_session, PLANTAS, PLANTA_PRINCIPAL
+
+TODAS = "Todas"
+
+_pool = ThreadPoolExecutor(max_workers=max(1, min(8, len(PLANTAS))), thread_name_prefix="planta")
+
+def consultar_plantas(consulta, plantas=None):
+    """Ejecutar ``consulta(session, planta)`` en cada planta y devolver {planta: resultado}"""
+    plantas = list(plantas or PLANTAS)
+
+    def ejecutar(planta):
+        session = get_session(planta)
+        try:
+            return consulta(session, planta)
+        finally:
+            session.close()
+
+    if len(plantas) == 1:
+        return {plantas[0]: ejecutar(plantas[0])}
+    return dict(zip(plantas, _pool.map(ejecutar, plantas)))
+
+def sumar(resultados):
+    """Sumar conteos parciales (números o diccionarios {clave: cantidad})"""
+    parciales = list(resultados.values())
+    if parciales and isinstance(parciales[0], dict):
+        total = Counter()
+        for parcial in parciales:
+            total.update(parcial)
+        return dict(total)
+    return sum(parciales)
+
+def concatenar(resultados, orden=None, limite=None, reverso=True):
+    """Unir listas parciales, añadiendo la planta si hay varias, y opcionalmente ordenar y recortar"""
+    filas = []
+    for planta, parcial in resultados.items():
+        for fila in parcial:
+            filas.append({**fila, 'Planta': planta} if len(resultados) > 1 else fila)
+    if orden:
+        filas.sort(key=orden, reverse=reverso)
+    return filas[:limite] if limite else filas
+
+def plantas_de(seleccion):
+    """Plantas que cubre una selección del selector (una o todas)"""
+    return list(PLANTAS) if seleccion == TODAS else [seleccion]
+
+def selector_planta(incluir_todas=False):
+    """Selector de planta en la barra lateral, compartido entre páginas.
+
+    Con una sola planta configurada no muestra nada y devuelve la principal.
+    """
+    if len(PLANTAS) == 1:
+        return PLANTA_PRINCIPAL
+
+    opciones = ([TODAS] if incluir_todas else []) + list(PLANTAS)
+    actual = st.session_state.get('planta_activa', opciones[0])
+    if actual not in opciones:
+        actual = PLANTA_PRINCIPAL
+    planta = st.sidebar.selectbox("🏭 Planta", opciones, index=opciones.index(actual))
+    st.session_state['planta_activa'] = planta
+    return planta
@@ -0,0 +1,362 @@
+"""Pruebas de rendimiento de las páginas con streamlit.testing (AppTest).
+
+Cada página se ejecuta sin navegador contra bases sembradas de tres
+tamaños (pequeña, mediana y grande). Para cada rerun (carga, cambio de
+filtro, envío de formulario...) se mide el tiempo, el número de consultas
+SQL y el pico de memoria (tracemalloc), y se compara con el presupuesto
+configurado. El proceso termina con código 1 si algún paso lo excede.
+
+Uso:
+    python rendimiento.py                             # todos los tamaños
+    python rendimiento.py --tamanos pequena mediana
+    python rendimiento.py --presupuestos presupuestos.json --salida resultados.json
+
+La memoria se mide en una segunda pasada para que la sobrecarga de
+tracemalloc no afecte a los tiempos; --sin-memoria la omite.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+# equipos, órdenes y avisos sembrados por tamaño
+TAMANOS = {
+    'pequena': {'equipos': 50, 'ordenes': 500, 'avisos': 200},
+    'mediana': {'equipos': 500, 'ordenes': 5000, 'avisos': 2000},
+    'grande': {'equipos': 2000, 'ordenes': 20000, 'avisos': 8000}
+}
+
+# Presupuesto por rerun: segundos, consultas SQL y MB de pico de memoria.
+# Una clave con el nombre de una página sobrescribe el presupuesto del tamaño
+# para esa página, p. ej. {'grande': {'pages/1_Órdenes_de_Trabajo.py': {'tiempo_s': 8}}}
+PRESUPUESTOS = {
+    'pequena': {'tiempo_s': 2.0, 'consultas': 40, 'memoria_mb': 50},
+    'mediana': {'tiempo_s': 5.0, 'consultas': 40, 'memoria_mb': 150},
+    'grande': {'tiempo_s': 15.0, 'consultas': 40, 'memoria_mb': 400}
+}
+
+# -- Siembra -----------------------------------------------------------------
+
+def sembrar(tamano):
+    """Poblar la base de la planta principal con datos sintéticos de ``tamano``"""
+    from database import get_session, Equipo, OrdenTrabajo, AvisoAveria
+
+    cantidades = TAMANOS[tamano]
+    azar = random.Random(42)
+    ahora = datetime.now()
+    ubicaciones = [f"Sala de Máquinas {i}" for i in range(1, 6)] + [f"Línea de Producción {i}" for i in range(1, 11)]
+    tecnicos = ["Juan Pérez", "María García", "Carlos López", "Ana Martínez", "Luis Torres", "Sofía Ramírez"]
+    prioridades = ["Baja", "Media", "Alta", "Crítica"]
+
+    equipos = [{
+        'id': i,
+        'codigo': f"EQ-{i:05d}",
+        'nombre': f"{azar.choice(['Compresor', 'Motor', 'Bomba', 'Ventilador', 'Transportador'])} {i}",
+        'descripcion': "Equipo sembrado para pruebas de rendimiento",
+        'ubicacion': azar.choice(ubicaciones),
+        'estado': azar.choice(["Operativo", "En Mantenimiento", "Parado"]),
+        'created_at': ahora,
+        'updated_at': ahora
+    } for i in range(1, cantidades['equipos'] + 1)]
+
+    ordenes = []
+    for i in range(1, cantidades['ordenes'] + 1):
+        creacion = ahora - timedelta(days=azar.randint(0, 700))
+        estado = azar.choice(["Pendiente", "En Progreso", "Completada", "Completada", "Cancelada"])
+        horas = azar.choice([2.0, 4.0, 6.0, 8.0])
+        ordenes.append({
+            'id': i,
+            'codigo': f"OT-{i:05d}",
+            'descripcion': f"Orden de trabajo sembrada {i}",
+            'tipo': azar.choice(["Preventivo", "Correctivo", "Predictivo"]),
+            'prioridad': azar.choice(prioridades),
+            'estado': estado,
+            'fecha_creacion': creacion,
+            'updated_at': creacion,
+            'fecha_fin_real': creacion + timedelta(days=azar.randint(1, 10)) if estado == "Completada" else None,
+            'tecnico_asignado': azar.choice(tecnicos),
+            'horas_estimadas': horas,
+            'horas_reales': horas * azar.uniform(0.7, 1.5) if estado == "Completada" else None,
+            'costo_estimado': horas * 50,
+            'costo_real': horas * 50 * azar.uniform(0.7, 1.5) if estado == "Completada" else None,
+            'equipo_id': azar.randint(1, cantidades['equipos'])
+        })
+
+    avisos = []
+    for i in range(1, cantidades['avisos'] + 1):
+        reporte = ahora - timedelta(days=azar.randint(0, 700))
+        estado = azar.choice(["Reportado", "En Análisis", "En Reparación", "Resuelto"])
+        avisos.append({
+            'id': i,
+            'codigo': f"AV-{i:05d}",
+            'descripcion': f"Aviso de avería sembrado {i}",
+            'fecha_reporte': reporte,
+            'updated_at': reporte,
+            'reportado_por': azar.choice(["Operario 1", "Supervisor", "Técnico"]),
+            'prioridad': azar.choice(prioridades),
+            'estado': estado,
+            'fecha_cierre': reporte + timedelta(days=2) if estado == "Resuelto" else None,
+            'equipo_id': azar.randint(1, cantidades['equipos'])
+        })
+
+    session = get_session()
+    try:
+        session.bulk_insert_mappings(Equipo, equipos)
+        session.bulk_insert_mappings(OrdenTrabajo, ordenes)
+        session.bulk_insert_mappings(AvisoAveria, avisos)
+        session.commit()
+    finally:
+        session.close()
+
+# -- Escenarios --------------------------------------------------------------
+
+def _por_etiqueta(widgets, etiqueta):
+    return next(w for w in widgets if w.label == etiqueta)
+
+def _crear_orden(at):
+    _por_etiqueta(at.text_area, "Descripción del trabajo").input("Orden de prueba de rendimiento")
+    _por_etiqueta(at.button, "Crear Orden").click()
+
+def _reportar_averia(at):
+    _por_etiqueta(at.text_area, "Descripción de la avería").input("Aviso de prueba de rendimiento")
+    _por_etiqueta(at.text_input, "Reportado por").input("Rendimiento")
+    _por_etiqueta(at.button, "Reportar Avería").click()
+
+# Página -> pasos (nombre, acción previa al rerun). El primer paso es la carga.
+ESCENARIOS = {
+    'app.py': [
+        ('carga', None),
+        ('rerun', lambda at: None)
+    ],
+    'pages/1_Órdenes_de_Trabajo.py': [
+        ('carga', None),
+        ('filtro_estado', lambda at: _por_etiqueta(at.selectbox, "Estado").select("Pendiente")),
+        ('busqueda_equipo', lambda at: at.text_input(key="filtro_equipo_busqueda").input("bomba")),
+        ('crear_orden', _crear_orden)
+    ],
+    'pages/2_Avisos_de_Averías.py': [
+        ('carga', None),
+        ('reportar_averia', _reportar_averia)
+    ],
+    'pages/3_Órdenes_Completadas.py': [
+        ('carga', None),
+        ('rango_completo', lambda at: _por_etiqueta(at.date_input, "Completadas desde").set_value(datetime(2000, 1, 1).date()))
+    ],
+    'pages/4_Equipos.py': [
+        ('carga', None),
+        ('busqueda_equipo', lambda at: at.text_input(key="detalle_equipo_busqueda").input("EQ-0001"))
+    ],
+    'pages/5_Reportes.py': [
+        ('carga', None)
+    ],
+    'pages/6_Costos.py': [
+        ('carga', None),
+        ('agrupar', lambda at: _por_etiqueta(at.multiselect, "Agrupar por").select("Técnico").select("Mes"))
+    ]
+}
+
+# -- Medición ----------------------------------------------------------------
+
+class ContadorConsultas:
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, *args, **kwargs):
+        self.total += 1
+
+def medir_pagina(pagina, pasos, memoria=False):
+    """Ejecutar los pasos de ``pagina`` midiendo tiempo y consultas, o solo memoria"""
+    import streamlit as st
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from streamlit.runtime.scriptrunner import ScriptRunnerEvent
+    from streamlit.testing.v1 import AppTest
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    # AppTest de streamlit 1.28 falla cuando el script llama a st.rerun():
+    # se detiene el script como st.stop() y el rerun se hace aquí, contando
+    # su coste dentro del mismo paso.
+    rerun_original = st.rerun
+    reruns = []
+
+    def rerun():
+        reruns.append(True)
+        st.stop()
+
+    st.rerun = rerun
+
+    # El tiempo se toma entre los eventos de inicio y fin de cada ejecución
+    # del script: at.run() espera el resultado sondeando cada 0,1 s y esa
+    # espera no debe cargarse a la página.
+    ejecuciones = []
+    fin_script = (ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                  ScriptRunnerEvent.SCRIPT_STOPPED_WITH_COMPILE_ERROR,
+                  ScriptRunnerEvent.SCRIPT_STOPPED_FOR_RERUN)
+
+    def registrar(sender, event, **datos):
+        if event == ScriptRunnerEvent.SCRIPT_STARTED:
+            ejecuciones.append([time.perf_counter(), None])
+        elif event in fin_script and ejecuciones and ejecuciones[-1][1] is None:
+            ejecuciones[-1][1] = time.perf_counter()
+
+    init_original = LocalScriptRunner.__init__
+
+    def init(runner, *args, **kwargs):
+        init_original(runner, *args, **kwargs)
+        runner.on_event.connect(registrar, weak=False)
+
+    LocalScriptRunner.__init__ = init
+    contador = ContadorConsultas()
+    event.listen(Engine, "before_cursor_execute", contador)
+    resultados = []
+    try:
+        at = AppTest.from_file(os.path.join(DIRECTORIO, pagina), default_timeout=120)
+        for nombre, accion in pasos:
+            if accion is not None:
+                accion(at)
+
+            contador.total = 0
+            ejecuciones.clear()
+            if memoria:
+                tracemalloc.start()
+            at.run()
+            while reruns:
+                reruns.clear()
+                at.run()
+            tiempo = sum(fin - inicio for inicio, fin in ejecuciones if fin is not None)
+
+            resultado = {'pagina': pagina, 'paso': nombre, 'errores': [str(e.value) for e in at.exception]}
+            if memoria:
+                resultado['memoria_mb'] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+                tracemalloc.stop()
+            else:
+                resultado['tiempo_s'] = round(tiempo, 3)
+                resultado['consultas'] = contador.total
+            resultados.append(resultado)
+    finally:
+        event.remove(Engine, "before_cursor_execute", contador)
+        LocalScriptRunner.__init__ = init_original
+        st.rerun = rerun_original
+    return resultados
+
+def _ejecutar_tamano(tamano, memoria, salida):
+    """Sembrar y medir un tamaño (se ejecuta en un subproceso con su propia base)"""
+    sys.path.insert(0, DIRECTORIO)
+    sembrar(tamano)
+
+    # Un servidor en marcha ya tiene estas librerías cargadas: su importación
+    # no debe contar contra la primera página medida
+    import pandas  # noqa: F401
+    import plotly.express  # noqa: F401
+    import streamlit.testing.v1  # noqa: F401
+
+    # Tampoco la creación de los motores ni la migración de las bases, que
+    # un servidor en marcha ya hizo: sus consultas no cuentan en la carga
+    from database import get_session, get_session_archivo, PLANTAS
+    for planta in PLANTAS:
+        get_session(planta).close()
+        get_session_archivo(planta).close()
+
+    resultados = []
+    for pagina, pasos in ESCENARIOS.items():
+        resultados.extend(medir_pagina(pagina, pasos, memoria))
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f)
+
+def _subproceso(tamano, memoria):
+    with tempfile.TemporaryDirectory() as directorio:
+        salida = os.path.join(directorio, 'resultados.json')
+        entorno = dict(os.environ)
+        entorno['MANTENIMIENTO_PLANTAS'] = json.dumps(
+            {'Principal': f"sqlite:///{os.path.join(directorio, 'mantenimiento.db')}"}
+        )
+        entorno['MANTENIMIENTO_REPORTES'] = os.path.join(directorio, 'reportes')
+        comando = [sys.executable, os.path.abspath(__file__), '--interno', tamano, '--salida', salida]
+        if memoria:
+            comando.append('--memoria')
+        subprocess.run(comando, cwd=directorio, env=entorno, check=True)
+        with open(salida, encoding='utf-8') as f:
+            return json.load(f)
+
+def _presupuesto_pagina(presupuesto, pagina):
+    valores = {k: v for k, v in presupuesto.items() if not isinstance(v, dict)}
+    valores.update(presupuesto.get(pagina, {}))
+    return valores
+
+def ejecutar(tamanos, presupuestos, memoria=True):
+    """Medir cada tamaño en procesos aislados y comparar con los presupuestos.
+
+    Tiempo y consultas se miden sin tracemalloc; la memoria se mide en una
+    segunda pasada sobre una base sembrada igual (la siembra es determinista).
+    """
+    resultados = []
+    for tamano in tamanos:
+        parciales = _subproceso(tamano, memoria=False)
+        memorias = _subproceso(tamano, memoria=True) if memoria else [{}] * len(parciales)
+
+        for resultado, medida in zip(parciales, memorias):
+            resultado = {'tamano': tamano, **resultado, 'memoria_mb': medida.get('memoria_mb')}
+            resultado['errores'] += [e for e in medida.get('errores', []) if e not in resultado['errores']]
+            presupuesto = _presupuesto_pagina(presupuestos[tamano], resultado['pagina'])
+            resultado['excedido'] = [
+                clave for clave, limite in presupuesto.items()
+                if resultado.get(clave) is not None and resultado[clave] > limite
+            ]
+            resultados.append(resultado)
+    return resultados
+
+def imprimir(resultados):
+    print(f"{'Tamaño':<8} {'Página':<34} {'Paso':<16} {'Tiempo(s)':>9} {'Consultas':>9} {'Mem(MB)':>8}  Estado")
+    for r in resultados:
+        estado = "OK"
+        if r['errores']:
+            estado = f"ERROR: {r['errores'][0][:60]}"
+        elif r['excedido']:
+            estado = "EXCEDE " + ", ".join(r['excedido'])
+        memoria = f"{r['memoria_mb']:.1f}" if r['memoria_mb'] is not None else "-"
+        print(f"{r['tamano']:<8} {r['pagina']:<34} {r['paso']:<16} {r['tiempo_s']:>9.3f} "
+              f"{r['consultas']:>9} {memoria:>8}  {estado}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pruebas de rendimiento de las páginas")
+    parser.add_argument("--tamanos", nargs="+", choices=list(TAMANOS), default=list(TAMANOS))
+    parser.add_argument("--presupuestos", help="JSON con presupuestos por tamaño que reemplazan los predeterminados")
+    parser.add_argument("--salida", help="Guardar los resultados en este archivo JSON")
+    parser.add_argument("--sin-memoria", action="store_true", help="No medir memoria (evita la segunda pasada)")
+    parser.add_argument("--interno", choices=list(TAMANOS), help=argparse.SUPPRESS)
+    parser.add_argument("--memoria", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interno:
+        _ejecutar_tamano(args.interno, args.memoria, args.salida)
+        sys.exit(0)
+
+    presupuestos = {t: dict(p) for t, p in PRESUPUESTOS.items()}
+    if args.presupuestos:
+        with open(args.presupuestos, encoding='utf-8') as f:
+            for tamano, valores in json.load(f).items():
+                for clave, valor in valores.items():
+                    if isinstance(valor, dict):
+                        presupuestos.setdefault(tamano, {}).setdefault(clave, {}).update(valor)
+                    else:
+                        presupuestos.setdefault(tamano, {})[clave] = valor
+
+    resultados = ejecutar(args.tamanos, presupuestos, memoria=not args.sin_memoria)
+    imprimir(resultados)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+    fallos = [r for r in resultados if r['errores'] or r['excedido']]
+    if fallos:
+        print(f"\n{len(fallos)} pasos con errores o fuera de presupuesto")
+        sys.exit(1)
@@ -0,0 +1,261 @@
+"""Generación de reportes en segundo plano.
+
+Las páginas solo encolan trabajos en la tabla ``reportes_jobs``. Este
+proceso, independiente de Streamlit, los reclama y los ejecuta en un pool
+de procesos, guardando los archivos generados en ``DIRECTORIO_REPORTES``.
+
+Uso:
+    python reportes.py                       # servir la cola
+    python reportes.py --una-vez             # procesar lo pendiente y salir
+    python reportes.py --solicitar semanal   # encolar un reporte (p. ej. desde cron)
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+import pandas as pd
+from database import get_session, get_session_archivo, AvisoAveria, ReporteJob, PLANTAS
+from archivo import ordenes_completadas
+from plantas import consultar_plantas
+
+DIRECTORIO_REPORTES = os.environ.get('MANTENIMIENTO_REPORTES', 'reportes')
+FORMATOS = {'Excel': 'xlsx', 'HTML': 'html'}
+
+# Un trabajo 'En Proceso' durante más tiempo se da por perdido (el proceso
+# que lo ejecutaba murió o el servidor se detuvo a medias)
+TIEMPO_MAXIMO_MIN = 30
+
+def _completadas_por_tecnico(session, planta, desde):
+    filas = [{
+        'Técnico': o.tecnico_asignado or 'No asignado',
+        'Horas Reales': o.horas_reales or 0,
+        'Costo Real': o.costo_real or 0
+    } for o in ordenes_completadas(session, desde=desde, planta=planta)]
+    df = pd.DataFrame(filas, columns=['Técnico', 'Horas Reales', 'Costo Real'])
+    return df.groupby('Técnico', as_index=False).agg(
+        Completadas=('Horas Reales', 'size'),
+        **{'Horas Reales': ('Horas Reales', 'sum'), 'Costo Real': ('Costo Real', 'sum')}
+    ).sort_values('Completadas', ascending=False)
+
+def _costo_por_equipo(session, planta, desde):
+    filas = [{
+        'Equipo': f"{o.equipo.codigo} — {o.equipo.nombre}" if o.equipo else 'N/A',
+        'Costo Estimado': o.costo_estimado or 0,
+        'Costo Real': o.costo_real or 0
+    } for o in ordenes_completadas(session, desde=desde, planta=planta)]
+    df = pd.DataFrame(filas, columns=['Equipo', 'Costo Estimado', 'Costo Real'])
+    df = df.groupby('Equipo', as_index=False).sum()
+    df['Desviación'] = df['Costo Real'] - df['Costo Estimado']
+    return df.sort_values('Costo Real', ascending=False)
+
+def _avisos_abiertos_por_prioridad(session, planta, desde):
+    avisos = session.query(AvisoAveria.prioridad, AvisoAveria.estado).filter(
+        AvisoAveria.estado != 'Resuelto'
+    ).all()
+    df = pd.DataFrame(avisos, columns=['Prioridad', 'Estado'])
+    return df.groupby(['Prioridad', 'Estado'], as_index=False).size().rename(columns={'size': 'Cantidad'})
+
+SECCIONES = {
+    'completadas_tecnico': ('Completadas por técnico', _completadas_por_tecnico),
+    'costo_equipo': ('Costo por equipo', _costo_por_equipo),
+    'avisos_prioridad': ('Avisos abiertos por prioridad', _avisos_abiertos_por_prioridad)
+}
+
+REPORTES = {
+    'semanal': ('Paquete semanal', ['completadas_tecnico', 'costo_equipo', 'avisos_prioridad']),
+    'completadas_tecnico': ('Completadas por técnico', ['completadas_tecnico']),
+    'costo_equipo': ('Costo por equipo', ['costo_equipo']),
+    'avisos_prioridad': ('Avisos abiertos por prioridad', ['avisos_prioridad'])
+}
+
+def solicitar_reporte(reporte, formato='Excel', planta=None, dias=7):
+    """Encolar un reporte y devolver el id del trabajo"""
+    if reporte not in REPORTES:
+        raise ValueError(f"Reporte desconocido: {reporte}")
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido: {formato}")
+
+    session = get_session()
+    try:
+        job = ReporteJob(reporte=reporte, formato=formato, planta=planta, dias=dias)
+        session.add(job)
+        session.commit()
+        return job.id
+    finally:
+        session.close()
+
+def _calcular_secciones(job):
+    """DataFrame por sección, con una columna Planta si el reporte cubre varias"""
+    plantas = [job.planta] if job.planta else list(PLANTAS)
+    desde = datetime.now() - timedelta(days=job.dias or 7)
+    resultado = {}
+
+    for clave in REPORTES[job.reporte][1]:
+        titulo, funcion = SECCIONES[clave]
+        # Las plantas se consultan en paralelo
+        partes = consultar_plantas(lambda session, planta: funcion(session, planta, desde), plantas)
+        if len(plantas) > 1:
+            for planta, df in partes.items():
+                df.insert(0, 'Planta', planta)
+        resultado[titulo] = pd.concat(list(partes.values()), ignore_index=True)
+    return resultado
+
+def _escribir(secciones, ruta, formato):
+    if formato == 'Excel':
+        with pd.ExcelWriter(ruta, engine='openpyxl') as writer:
+            for titulo, df in secciones.items():
+                df.to_excel(writer, sheet_name=titulo[:31], index=False)
+    else:
+        partes = [f"<h2>{titulo}</h2>\n{df.to_html(index=False)}" for titulo, df in secciones.items()]
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write("<html><head><meta charset='utf-8'></head><body>\n")
+            f.write("\n".join(partes))
+            f.write("\n</body></html>\n")
+
+def _finalizar(job_id, valores):
+    """Guardar el resultado solo si el trabajo sigue 'En Proceso'.
+
+    fallar_vencidos puede haberlo dado por perdido mientras se generaba: en
+    ese caso el usuario ya vio el error y el resultado tardío se descarta.
+    """
+    session = get_session()
+    try:
+        actualizados = session.query(ReporteJob).filter_by(id=job_id, estado='En Proceso').update(
+            {**valores, 'fecha_fin': datetime.utcnow()}, synchronize_session=False
+        )
+        session.commit()
+        return bool(actualizados)
+    finally:
+        session.close()
+
+def generar_reporte(job_id):
+    """Ejecutar un trabajo ya reclamado (se llama dentro del pool de procesos)"""
+    session = get_session()
+    try:
+        job = session.get(ReporteJob, job_id)
+        if job is None:
+            return job_id
+        session.expunge(job)
+    finally:
+        session.close()
+
+    ruta = None
+    try:
+        secciones = _calcular_secciones(job)
+        os.makedirs(DIRECTORIO_REPORTES, exist_ok=True)
+        nombre = f"{job.reporte}_{job.id:05d}_{datetime.now().strftime('%Y%m%d_%H%M')}.{FORMATOS[job.formato]}"
+        # Ruta absoluta: Streamlit puede ejecutarse desde otro directorio
+        ruta = os.path.abspath(os.path.join(DIRECTORIO_REPORTES, nombre))
+        _escribir(secciones, ruta, job.formato)
+        valores = {'estado': 'Completado', 'archivo': ruta}
+    except Exception as e:
+        valores = {'estado': 'Error', 'error': str(e)}
+
+    if not _finalizar(job_id, valores) and ruta and os.path.exists(ruta):
+        os.remove(ruta)
+    return job_id
+
+def reclamar_pendientes():
+    """Marcar como 'En Proceso' los trabajos pendientes y devolver sus ids"""
+    session = get_session()
+    try:
+        ids = [i for (i,) in session.query(ReporteJob.id).filter_by(estado='Pendiente').order_by(ReporteJob.id)]
+        reclamados = []
+        for job_id in ids:
+            # La condición sobre el estado evita que dos servidores tomen el mismo trabajo
+            actualizados = session.query(ReporteJob).filter_by(id=job_id, estado='Pendiente').update(
+                {'estado': 'En Proceso', 'fecha_inicio': datetime.utcnow()}, synchronize_session=False
+            )
+            if actualizados:
+                reclamados.append(job_id)
+        session.commit()
+        return reclamados
+    finally:
+        session.close()
+
+def _marcar_error(condicion, mensaje):
+    """Pasar a 'Error' los trabajos 'En Proceso' que cumplan ``condicion``"""
+    session = get_session()
+    try:
+        fallidos = session.query(ReporteJob).filter(ReporteJob.estado == 'En Proceso', condicion).update(
+            {'estado': 'Error', 'error': mensaje, 'fecha_fin': datetime.utcnow()}, synchronize_session=False
+        )
+        session.commit()
+        return fallidos
+    finally:
+        session.close()
+
+def fallar_vencidos(minutos=TIEMPO_MAXIMO_MIN):
+    """Marcar como error los trabajos que llevan más de ``minutos`` en proceso"""
+    limite = datetime.utcnow() - timedelta(minutes=minutos)
+    return _marcar_error(ReporteJob.fecha_inicio < limite,
+                         f"Sin terminar tras {minutos} minutos en proceso; vuelva a solicitarlo")
+
+def preparar_bases():
+    """Crear y migrar las bases de todas las plantas antes de lanzar el pool.
+
+    Cada proceso del pool crea su motor al primer uso; si la base aún no
+    existe, varios procesos ejecutarían create_all a la vez.
+    """
+    for planta in PLANTAS:
+        get_session(planta).close()
+        get_session_archivo(planta).close()
+
+def servir(procesos=2, intervalo=5, una_vez=False, tiempo_maximo=TIEMPO_MAXIMO_MIN):
+    preparar_bases()
+    pool = ProcessPoolExecutor(max_workers=procesos)
+    en_curso = {}
+    try:
+        while True:
+            vencidos = fallar_vencidos(tiempo_maximo)
+            if vencidos:
+                print(f"{vencidos} reportes sin terminar marcados como error")
+
+            for job_id in reclamar_pendientes():
+                en_curso[pool.submit(generar_reporte, job_id)] = job_id
+            if una_vez:
+                wait(en_curso)
+
+            roto = False
+            for futuro in [f for f in en_curso if f.done()]:
+                job_id = en_curso.pop(futuro)
+                try:
+                    futuro.result()
+                    print(f"Reporte {job_id} procesado")
+                except Exception as e:
+                    # Si el proceso murió, generar_reporte no llegó a guardar el estado
+                    roto = roto or isinstance(e, BrokenProcessPool)
+                    _marcar_error(ReporteJob.id == job_id, f"Fallo del proceso de reportes: {e!r}")
+                    print(f"Reporte {job_id} fallido: {e!r}")
+
+            if roto:
+                # Un pool roto no acepta más trabajos: se reemplaza
+                pool.shutdown(wait=False)
+                pool = ProcessPoolExecutor(max_workers=procesos)
+            if una_vez:
+                return
+            time.sleep(intervalo)
+    finally:
+        pool.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor de reportes en segundo plano")
+    parser.add_argument("--procesos", type=int, default=2, help="Tamaño del pool de procesos")
+    parser.add_argument("--intervalo", type=int, default=5, help="Segundos entre revisiones de la cola")
+    parser.add_argument("--una-vez", action="store_true", help="Procesar lo pendiente y salir")
+    parser.add_argument("--tiempo-maximo", type=int, default=TIEMPO_MAXIMO_MIN,
+                        help="Minutos en proceso tras los que un reporte se marca como error")
+    parser.add_argument("--solicitar", choices=list(REPORTES), help="Encolar un reporte y salir")
+    parser.add_argument("--formato", choices=list(FORMATOS), default='Excel')
+    parser.add_argument("--planta", choices=list(PLANTAS), help="Planta del reporte (todas por defecto)")
+    parser.add_argument("--dias", type=int, default=7, help="Periodo cubierto en días")
+    args = parser.parse_args()
+
+    if args.solicitar:
+        job_id = solicitar_reporte(args.solicitar, args.formato, args.planta, args.dias)
+        print(f"Reporte {job_id} encolado")
+    else:
+        servir(procesos=args.procesos, intervalo=args.intervalo, una_vez=args.una_vez,
+               tiempo_maximo=args.tiempo_maximo)
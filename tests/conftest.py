@@ -0,0 +1,45 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO)
+
+# database lee las plantas al importarse: la planta principal de las pruebas
+# vive en un directorio temporal para no tocar mantenimiento.db
+_temporal = tempfile.mkdtemp(prefix="mantenimiento_pruebas_")
+os.environ['MANTENIMIENTO_PLANTAS'] = f'{{"Principal": "sqlite:///{os.path.join(_temporal, "mantenimiento.db")}"}}'
+os.environ['MANTENIMIENTO_REPORTES'] = os.path.join(_temporal, 'reportes')
+
+import database  # noqa: E402
+
+
+@pytest.fixture
+def crear_planta(tmp_path, monkeypatch):
+    """Fábrica de plantas con su propia base (y base de archivo) en ``tmp_path``, ya sembradas"""
+    creadas = []
+
+    def crear(sufijo=""):
+        nombre = f"Prueba {tmp_path.name}{sufijo}"
+        monkeypatch.setitem(database.PLANTAS, nombre, {
+            'url': f"sqlite:///{tmp_path / f'planta{sufijo}.db'}",
+            'url_archivo': None,
+            'ubicaciones': []
+        })
+        database.inicializar_datos(nombre)
+        creadas.append(nombre)
+        return nombre
+
+    yield crear
+    for nombre in creadas:
+        for cache in (database._sessions, database._sessions_archivo):
+            maker = cache.pop(nombre, None)
+            if maker is not None:
+                maker.kw['bind'].dispose()
+
+
+@pytest.fixture
+def planta(crear_planta):
+    return crear_planta()
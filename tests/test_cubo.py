@@ -0,0 +1,22 @@
+from cubo import combinar_plantas, cuboide
+from plantas import consultar_plantas
+
+
+def test_combinar_plantas_no_suma_equipos_de_plantas_distintas(crear_planta):
+    norte = crear_planta("_norte")
+    sur = crear_planta("_sur")
+
+    # Ambas plantas tienen EQ-00003 — Transportador C-8 con una orden completada
+    resultados = consultar_plantas(lambda session, p: cuboide(['equipo'], p), [norte, sur])
+    df = combinar_plantas(resultados, ['equipo'])
+
+    assert sorted(df['equipo']) == [
+        f"{norte} — EQ-00003 — Transportador C-8",
+        f"{sur} — EQ-00003 — Transportador C-8"
+    ]
+    assert df['ordenes'].tolist() == [1, 1]
+
+
+def test_combinar_plantas_con_una_planta_conserva_la_etiqueta(planta):
+    df = combinar_plantas({planta: cuboide(['equipo', 'tipo'], planta)}, ['equipo'])
+    assert df['equipo'].tolist() == ["EQ-00003 — Transportador C-8"]
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+from archivo import archivar_cerrados
+from database import get_session, OrdenTrabajo
+from incremental import datos_dashboard
+
+
+def _nueva_orden(session, numero):
+    session.add(OrdenTrabajo(
+        codigo=f"OT-{numero:05d}",
+        descripcion=f"Orden nueva {numero}",
+        tipo="Correctivo",
+        prioridad="Media",
+        estado="Pendiente",
+        equipo_id=1
+    ))
+
+
+def test_archivar_e_insertar_tantas_como_se_archivan(planta):
+    session = get_session(planta)
+    try:
+        metricas = datos_dashboard(session, planta)['metricas']
+        assert metricas['total_ordenes'] == 4
+
+        # OT-00003 (Completada) pasa a ser antigua y se archiva
+        orden = session.query(OrdenTrabajo).filter_by(codigo="OT-00003").one()
+        orden.fecha_creacion = orden.fecha_fin_real = datetime.now() - timedelta(days=800)
+        session.commit()
+        assert archivar_cerrados(dias=365, planta=planta)['ordenes'] == 1
+
+        # Entran más filas de las que salieron: el recuento no baja
+        _nueva_orden(session, 5)
+        _nueva_orden(session, 6)
+        session.commit()
+
+        # La caché caliente descarta la archivada; los totales la suman desde el archivo
+        datos = datos_dashboard(session, planta)
+        assert session.query(OrdenTrabajo).count() == 5
+        assert datos['metricas']['total_ordenes'] == 6
+        assert datos['por_estado']['Completada'] == 1
+        assert "OT-00003" not in [fila['Código'] for fila in datos['recientes']]
+    finally:
+        session.close()
+
+
+def test_borrado_e_insercion_en_la_misma_actualizacion(planta):
+    session = get_session(planta)
+    try:
+        datos_dashboard(session, planta)
+
+        session.query(OrdenTrabajo).filter_by(codigo="OT-00002").delete()
+        _nueva_orden(session, 5)
+        session.commit()
+
+        codigos = [fila['Código'] for fila in datos_dashboard(session, planta)['recientes']]
+        assert sorted(codigos) == ["OT-00001", "OT-00003", "OT-00004", "OT-00005"]
+    finally:
+        session.close()
+
+
+def test_totales_incluyen_ordenes_archivadas(planta):
+    session = get_session(planta)
+    try:
+        antes = datos_dashboard(session, planta)
+
+        orden = session.query(OrdenTrabajo).filter_by(codigo="OT-00003").one()
+        orden.fecha_creacion = orden.fecha_fin_real = datetime.now() - timedelta(days=800)
+        session.commit()
+        archivar_cerrados(dias=365, planta=planta)
+
+        despues = datos_dashboard(session, planta)
+        assert despues['metricas'] == antes['metricas']
+        assert despues['por_estado'] == antes['por_estado']
+        assert despues['por_prioridad'] == antes['por_prioridad']
+    finally:
+        session.close()
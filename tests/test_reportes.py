@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import reportes
+from database import get_session, ReporteJob
+
+
+def _estado(job_id):
+    session = get_session()
+    try:
+        job = session.get(ReporteJob, job_id)
+        return job.estado, job.archivo, job.error
+    finally:
+        session.close()
+
+
+def test_reporte_de_varias_plantas(crear_planta):
+    norte = crear_planta("_norte")
+    sur = crear_planta("_sur")
+    job = ReporteJob(reporte='costo_equipo', formato='HTML', planta=None, dias=30)
+
+    secciones = reportes._calcular_secciones(job)
+    df = secciones['Costo por equipo']
+    assert {norte, sur} <= set(df['Planta'])
+
+
+def test_vencido_no_se_sobrescribe_al_terminar(tmp_path, monkeypatch):
+    monkeypatch.setattr(reportes, 'DIRECTORIO_REPORTES', str(tmp_path))
+    job_id = reportes.solicitar_reporte('avisos_prioridad', 'HTML')
+    assert job_id in reportes.reclamar_pendientes()
+
+    # Mientras se genera, el servidor lo da por perdido
+    session = get_session()
+    session.query(ReporteJob).filter_by(id=job_id).update(
+        {'fecha_inicio': datetime.utcnow() - timedelta(hours=2)}
+    )
+    session.commit()
+    session.close()
+    assert reportes.fallar_vencidos(30) == 1
+
+    reportes.generar_reporte(job_id)
+    estado, archivo, error = _estado(job_id)
+    assert estado == 'Error' and archivo is None and 'minutos' in error
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_reporte_completado(tmp_path, monkeypatch):
+    monkeypatch.setattr(reportes, 'DIRECTORIO_REPORTES', str(tmp_path))
+    job_id = reportes.solicitar_reporte('avisos_prioridad', 'HTML')
+    reportes.reclamar_pendientes()
+
+    reportes.generar_reporte(job_id)
+    estado, archivo, _ = _estado(job_id)
+    assert estado == 'Completado' and archivo.startswith(str(tmp_path))
+
+
+def test_trabajo_inexistente():
+    assert reportes.generar_reporte(999999) == 999999